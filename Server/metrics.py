@@ -0,0 +1,147 @@
+import os
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['route', 'method', 'status'], buckets=LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries issued per request',
+    ['route'], buckets=QUERY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL per request',
+    ['route'], buckets=LATENCY_BUCKETS)
+REQUEST_ERRORS = Counter(
+    'http_request_errors_total', 'Failed requests by route and error class',
+    ['route', 'error'])
+CHANNEL_SEND_SECONDS = Histogram(
+    'channel_layer_send_seconds', 'Time to send one outbox batch to the channel layer',
+    buckets=LATENCY_BUCKETS)
+CHANNEL_MESSAGES = Counter(
+    'channel_layer_messages_total', 'Channel-layer messages sent by outcome',
+    ['outcome'])
+PAYOS_REQUEST_SECONDS = Histogram(
+    'payos_request_duration_seconds', 'Outbound PayOS HTTP calls',
+    ['operation', 'outcome'], buckets=LATENCY_BUCKETS)
+
+# [query count, seconds] of the request being served, or None outside one.
+_db_usage = ContextVar('db_usage', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    usage = _db_usage.get()
+    if usage is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        usage[0] += 1
+        usage[1] += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+for _connection in connections.all(initialized_only=True):
+    install_query_recorder(None, _connection)
+
+
+def error_class(response):
+    """Classify failures the views turned into ordinary responses."""
+    if response.status_code >= 400:
+        return f"http_{response.status_code}"
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict):
+        code = data.get('error_code') or data.get('status')
+        if code in ('2', '9999'):
+            return f"app_{code}"
+    return None
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL query count/time and errors per resolved route.
+    Works under both WSGI and ASGI; SQL issued from sync views running in
+    a worker thread is still attributed because the context is copied.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _db_usage.reset(token)
+        self.observe(request, response, time.perf_counter() - started, usage)
+        return response
+
+    async def __acall__(self, request):
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _db_usage.reset(token)
+        self.observe(request, response, time.perf_counter() - started, usage)
+        return response
+
+    def process_exception(self, request, exception):
+        request._metrics_error = type(exception).__name__
+
+    def observe(self, request, response, elapsed, usage):
+        route = route_of(request)
+        REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(elapsed)
+        REQUEST_QUERIES.labels(route).observe(usage[0])
+        REQUEST_DB_SECONDS.labels(route).observe(usage[1])
+        error = getattr(request, '_metrics_error', None) or error_class(response)
+        if error:
+            REQUEST_ERRORS.labels(route, error).inc()
+
+
+def route_of(request):
+    # The URL pattern, not the path, keeps label cardinality bounded.
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match else 'unmatched'
+
+
+def metrics_view(request):
+    # Route labels and SQL timings describe the deployment, so outside
+    # DEBUG they are only served to a scraper holding METRICS_TOKEN.
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return HttpResponseForbidden()
+
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -22,6 +22,51 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        "LOCATION": config('CACHE_LOCATION', default='redis://127.0.0.1:6379/1'),
+    },
+}
+
+# When set, GET /metrics requires "Authorization: Bearer <token>". Without a
+# token /metrics is only served when DEBUG is on.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Cached dashboard/report responses: ranges that include today expire
+# quickly, closed periods live until a payment in them changes.
+REPORT_CACHE_LIVE_TTL = config('REPORT_CACHE_LIVE_TTL', default=30, cast=int)
+REPORT_CACHE_TTL = config('REPORT_CACHE_TTL', default=24 * 60 * 60, cast=int)
+
+# Catalog sync watermarks never pass now() minus this many seconds, so a
+# product written by a transaction still in flight is picked up next time.
+CATALOG_SYNC_LAG = config('CATALOG_SYNC_LAG', default=5, cast=int)
+
+# Barcode scans: per-process LRU entries live a few seconds, shared cache
+# entries until the product changes (bounded by the TTL as a safety net).
+BARCODE_CACHE_SIZE = config('BARCODE_CACHE_SIZE', default=20000, cast=int)
+BARCODE_CACHE_LOCAL_TTL = config('BARCODE_CACHE_LOCAL_TTL', default=5, cast=int)
+BARCODE_CACHE_TTL = config('BARCODE_CACHE_TTL', default=10 * 60, cast=int)
+
+# QuickSearch queries its sources in parallel and answers with whatever
+# finished within the deadline.
+QUICK_SEARCH_DEADLINE_MS = config('QUICK_SEARCH_DEADLINE_MS', default=300, cast=int)
+QUICK_SEARCH_WORKERS = config('QUICK_SEARCH_WORKERS', default=6, cast=int)
+
+# Uploaded product catalogs and their per-row error reports. Must be shared
+# by the web servers and the process_product_imports worker.
+PRODUCT_IMPORT_DIR = config('PRODUCT_IMPORT_DIR', default=str(BASE_DIR / 'imports'))
+PRODUCT_IMPORT_CHUNK_SIZE = config('PRODUCT_IMPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Stock held by a pending PayOS payment (and its QR link) expires after
+# this many seconds; the expire_stock_reservations worker gives it back.
+PAYMENT_RESERVATION_TTL = config('PAYMENT_RESERVATION_TTL', default=15 * 60, cast=int)
+
+# Low-stock alerts are batched into one broadcast per interval, and a
+# product is not announced again until the cooldown (seconds) has passed.
+REORDER_DIGEST_INTERVAL = config('REORDER_DIGEST_INTERVAL', default=60, cast=int)
+REORDER_ALERT_COOLDOWN = config('REORDER_ALERT_COOLDOWN', default=30 * 60, cast=int)
+
 INSTALLED_APPS = [
     'django_extensions',
     'django.contrib.admin',
@@ -30,6 +75,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -45,6 +91,7 @@ INSTALLED_APPS = [
 ]
 ASGI_APPLICATION = 'Server.asgi.application'
 MIDDLEWARE = [
+    'Server.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -118,6 +165,9 @@ LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
 
+# Local time of the store, used for "today" windows and report buckets.
+STORE_TIME_ZONE = config('STORE_TIME_ZONE', default='Asia/Ho_Chi_Minh')
+
 USE_I18N = True
 
 USE_TZ = True
@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from accounts.models import User
+
+
+def request_count(route, status):
+    return REGISTRY.get_sample_value(
+        'http_request_duration_seconds_count',
+        {'route': route, 'method': 'GET', 'status': str(status)}) or 0
+
+
+class MetricsMiddlewareTests(TestCase):
+
+    def test_sync_views_are_labelled_by_route(self):
+        route = 'api/product/scan/<str:bar_code>/'
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        before = request_count(route, 200)
+
+        client.get('/api/product/scan/8930000000001/')
+        client.get('/api/product/scan/8930000000002/')
+
+        self.assertEqual(request_count(route, 200), before + 2)
+        self.assertGreaterEqual(REGISTRY.get_sample_value(
+            'http_request_db_queries_count', {'route': route}), 2)
+
+    async def test_async_views_are_labelled_by_route(self):
+        route = 'api/home/quick/search/'
+        before = request_count(route, 401)
+
+        response = await self.async_client.get('/api/home/quick/search/', {'q': 'milk'})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(request_count(route, 401), before + 1)
+        self.assertGreaterEqual(REGISTRY.get_sample_value(
+            'http_request_errors_total', {'route': route, 'error': 'http_401'}), 1)
+
+    def test_unknown_paths_share_one_label(self):
+        before = request_count('unmatched', 404)
+
+        self.client.get('/no/such/page/')
+
+        self.assertEqual(request_count('unmatched', 404), before + 1)
+
+
+class MetricsEndpointTests(TestCase):
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_refused_without_a_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(DEBUG=True, METRICS_TOKEN='')
+    def test_open_in_debug_without_a_token(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds', response.content)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='secret')
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
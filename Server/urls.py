@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path
 from django.urls import include
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,4 +11,5 @@ urlpatterns = [
     path('api/payments/', include('payments.urls')),
     path('api/debit/', include('debit.urls')),
     path('api/report/', include('report.urls')),
+    path('metrics', metrics_view),
 ]
@@ -0,0 +1,198 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from functools import partial
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from Server.metrics import CHANNEL_MESSAGES, CHANNEL_SEND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+REORDER_MESSAGE_TYPE = 'remind_reorder'
+
+
+def publish(group, message):
+    """
+    Send a channel-layer message once the surrounding transaction commits.
+    Outside a transaction the message is queued immediately.
+    """
+    transaction.on_commit(partial(dispatcher.enqueue, group, message))
+
+
+def notify_reorder(bar_codes):
+    """
+    Report products that reached their reorder point. They are announced in
+    the next reorder digest once the surrounding transaction commits.
+    """
+    if bar_codes:
+        transaction.on_commit(partial(reorder_digest.add, list(bar_codes)))
+
+
+def reorder_message(bar_codes):
+    return {
+        'type': 'message',
+        'data': {
+            'message_type': REORDER_MESSAGE_TYPE,
+            'items': bar_codes,
+            'message': 'Sản phẩm gần sắp hết'
+        }
+    }
+
+
+def is_reorder_message(message):
+    if message.get('type') == REORDER_MESSAGE_TYPE:
+        return True
+    data = message.get('data') or {}
+    return message.get('type') == 'message' and data.get('message_type') == REORDER_MESSAGE_TYPE
+
+
+def coalesce(messages):
+    merged = {}
+    for group, message in messages:
+        if is_reorder_message(message):
+            # Reorder reminders from a burst of checkouts collapse into one
+            # message per group carrying the union of the bar codes.
+            key = (group, 'reorder', message.get('type'))
+            if key in merged:
+                items = merged[key][1]['data']['items']
+                items.extend(
+                    code for code in message['data'].get('items', []) if code not in items)
+                continue
+            message = {**message, 'data': {
+                **message['data'], 'items': list(message['data'].get('items', []))}}
+        else:
+            # Anything else is a distinct event even when two payloads
+            # match (two equal debits for one customer), so it is kept.
+            key = (group, len(merged))
+        merged[key] = (group, message)
+    return list(merged.values())
+
+
+class ChannelDispatcher:
+
+    def __init__(self, batch_size=200, linger=0.02):
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def enqueue(self, group, message):
+        self._queue.append((group, message))
+        self._ensure_worker()
+        self._wakeup.set()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='channel-outbox', daemon=True)
+                self._thread.start()
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Give a burst of commits a moment to pile up so it goes out
+            # as one coalesced batch.
+            loop.run_until_complete(asyncio.sleep(self.linger))
+            while self._queue:
+                try:
+                    loop.run_until_complete(self.send(self._drain()))
+                except Exception:
+                    logger.exception("Channel outbox batch failed")
+
+    async def send(self, batch):
+        if not batch:
+            return
+        channel_layer = get_channel_layer()
+        messages = coalesce(batch)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(channel_layer.group_send(group, message) for group, message in messages),
+            return_exceptions=True
+        )
+        CHANNEL_SEND_SECONDS.observe(time.perf_counter() - started)
+        for (group, message), result in zip(messages, results):
+            if isinstance(result, Exception):
+                CHANNEL_MESSAGES.labels(type(result).__name__).inc()
+                logger.warning(
+                    "Channel layer send to %s failed (%s): %s",
+                    group, message.get('type'), result)
+            else:
+                CHANNEL_MESSAGES.labels('sent').inc()
+
+    def flush(self):
+        """Send everything queued so far from the calling thread."""
+        while self._queue:
+            async_to_sync(self.send)(self._drain())
+
+
+class ReorderDigest:
+    """
+    Debounces reorder alerts: bar codes reported during one
+    REORDER_DIGEST_INTERVAL go out as a single broadcast, and a bar code
+    announced by any process stays quiet for REORDER_ALERT_COOLDOWN.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, bar_codes):
+        with self._lock:
+            self._pending.update(dict.fromkeys(bar_codes))
+            if self._timer is None:
+                self._timer = threading.Timer(settings.REORDER_DIGEST_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            bar_codes = list(self._pending)
+            self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        # cache.add is atomic in the shared cache, so only one process wins
+        # the right to announce a given bar code per cooldown. Without the
+        # cache every code is announced: a repeat beats a lost alert.
+        try:
+            bar_codes = [
+                bar_code for bar_code in bar_codes
+                if cache.add(f'reorder-alert:{bar_code}', 1, settings.REORDER_ALERT_COOLDOWN)
+            ]
+        except Exception as ex:
+            logger.warning("Reorder alert cooldown unavailable: %s", ex)
+        if bar_codes:
+            dispatcher.enqueue('broadcast', reorder_message(bar_codes))
+        return bar_codes
+
+
+dispatcher = ChannelDispatcher()
+reorder_digest = ReorderDigest()
+atexit.register(dispatcher.flush)
+# atexit runs in reverse order: the digest is queued before the final flush.
+atexit.register(reorder_digest.flush)
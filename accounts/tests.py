@@ -1,3 +1,105 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from .outbox import ReorderDigest, coalesce, dispatcher, notify_reorder, publish
 
-# Create your tests here.
+
+def reorder_message(items):
+    return {
+        "type": "message",
+        "data": {
+            "message_type": "remind_reorder",
+            "items": items,
+            "message": "Sản phẩm gần sắp hết"
+        }
+    }
+
+
+class OutboxTests(TestCase):
+
+    def test_message_is_queued_only_after_commit(self):
+        with mock.patch.object(dispatcher, "enqueue") as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    publish("broadcast", {"type": "payment_success", "data": {}})
+                    enqueue.assert_not_called()
+
+        enqueue.assert_called_once_with(
+            "broadcast", {"type": "payment_success", "data": {}})
+
+    def test_rolled_back_sale_is_never_announced(self):
+        with mock.patch.object(dispatcher, "enqueue") as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        publish("broadcast", {"type": "payment_success", "data": {}})
+                        raise ValueError("checkout failed")
+                except ValueError:
+                    pass
+
+        enqueue.assert_not_called()
+
+    def test_coalesce_merges_reorder_reminders_and_keeps_other_events(self):
+        debit = {"type": "debit_created", "data": {"customerName": "An", "debitAmount": 50000.0}}
+        messages = coalesce([
+            ("broadcast", debit),
+            ("broadcast", reorder_message(["A", "B"])),
+            ("broadcast", dict(debit)),
+            ("broadcast", reorder_message(["B", "C"])),
+        ])
+
+        self.assertEqual(messages, [
+            ("broadcast", debit),
+            ("broadcast", reorder_message(["A", "B", "C"])),
+            ("broadcast", debit),
+        ])
+
+
+@override_settings(REORDER_DIGEST_INTERVAL=3600, REORDER_ALERT_COOLDOWN=3600)
+class ReorderDigestTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.digest = ReorderDigest()
+        patcher = mock.patch.object(dispatcher, "enqueue")
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.digest.flush)
+
+    def test_alerts_in_one_interval_go_out_as_one_digest(self):
+        self.digest.add(["A", "B"])
+        self.digest.add(["B", "C"])
+        self.enqueue.assert_not_called()
+
+        self.digest.flush()
+
+        self.enqueue.assert_called_once_with("broadcast", reorder_message(["A", "B", "C"]))
+
+    def test_announced_products_stay_quiet_during_cooldown(self):
+        self.digest.add(["A"])
+        self.digest.flush()
+        self.digest.add(["A", "B"])
+
+        self.assertEqual(self.digest.flush(), ["B"])
+        self.assertEqual(self.digest.flush(), [])
+
+    def test_cache_errors_announce_the_whole_digest(self):
+        self.digest.add(["A", "B"])
+
+        with mock.patch.object(cache, "add", side_effect=ConnectionError("down")):
+            self.assertEqual(self.digest.flush(), ["A", "B"])
+
+        self.enqueue.assert_called_once_with("broadcast", reorder_message(["A", "B"]))
+
+    def test_rolled_back_sale_reports_nothing(self):
+        with mock.patch("accounts.outbox.reorder_digest", self.digest):
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        notify_reorder(["A"])
+                        raise ValueError("checkout failed")
+                except ValueError:
+                    pass
+
+        self.assertEqual(self.digest.flush(), [])
@@ -6,10 +6,10 @@ from django.db import transaction
 from django.db.models import Sum, Q, F
 import json
 import uuid
-from product.models import Product
+from product.ledger import Kind
+from product.services import deduct_stock
 from ..models import Customer, Debit
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from accounts.outbox import notify_reorder, publish
 
 
 class CreateDebitView(APIView):
@@ -79,27 +79,10 @@ class CreateDebitView(APIView):
                     note=note
                 )
 
-                list_product_reorder = []
+                list_product_reorder = deduct_stock(
+                    items, kind=Kind.CREDIT_SALE, reference=f"debit-{debit.id}")
 
-                for item in items:
-                    bar_code = item.get('bar_code') or item.get('sku')
-                    quantity = item.get('quantity', 0)
-
-                    if bar_code:
-                        try:
-                            product = Product.objects.get(bar_code=bar_code)
-                            product.stock_quantity = max(
-                                0, product.stock_quantity - quantity)
-
-                            if product.stock_quantity <= product.reorder_point:
-                                list_product_reorder.append(product.bar_code)
-
-                            product.save()
-                        except Product.DoesNotExist:
-                            pass
-
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
+                publish(
                     "broadcast",
                     {
                         "type": "debit_created",
@@ -111,18 +94,7 @@ class CreateDebitView(APIView):
                     }
                 )
 
-                if list_product_reorder:
-                    async_to_sync(channel_layer.group_send)(
-                        "broadcast",
-                        {
-                            "type": "message",
-                            "data": {
-                                'message_type': 'remind_reorder',
-                                "items": list_product_reorder,
-                                "message": "Sản phẩm gần sắp hết"
-                            }
-                        }
-                    )
+                notify_reorder(list_product_reorder)
 
                 return Response({
                     'status': '1',
@@ -2,12 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, F, Q
-from django.utils.timezone import now
-from datetime import timedelta, datetime
-import json
-from payments.models import Payment
-from product.models import Product
+from django.db.models import Sum, F, Max, DecimalField
+from django.utils.timezone import localtime
+from datetime import timedelta
+from functools import partial
+from payments.models import Payment, PaymentItem
+from report.cache import cached_report
+from report.comparison import (
+    compare_periods, calculate_growth, calculate_profit_margin
+)
+from report.timeseries import (
+    HOUR, DAY, bucket_series, store_now, store_timezone
+)
 
 class GetDashboardView(APIView):
     permission_classes = [IsAuthenticated]
@@ -20,67 +26,18 @@ class GetDashboardView(APIView):
             prev_start, prev_end = self.get_previous_date_range(
                 period, start_date)
 
-            current_payments = Payment.objects.filter(
-                is_active=True,
-                status='paid',
-                created_at__gte=start_date,
-                created_at__lte=end_date
+            response = cached_report(
+                'dashboard',
+                {'period': period},
+                prev_start.date(),
+                end_date.date(),
+                partial(self.get_summary, period, start_date, end_date,
+                        prev_start, prev_end)
             )
 
-            previous_payments = Payment.objects.filter(
-                is_active=True,
-                status='paid',
-                created_at__gte=prev_start,
-                created_at__lte=prev_end
-            )
-
-            today_revenue = current_payments.aggregate(
-                total=Sum('amount'))['total'] or 0
-            today_orders = current_payments.count()
-            today_profit = self.calculate_total_profit(current_payments)
-
-            prev_revenue = previous_payments.aggregate(
-                total=Sum('amount'))['total'] or 0
-            prev_orders = previous_payments.count()
-            prev_profit = self.calculate_total_profit(previous_payments)
-
-            today_customers = current_payments.values(
-                'buyer_phone').distinct().count()
-            new_customers = current_payments.filter(
-                buyer_phone__isnull=False
-            ).values('buyer_phone').distinct().count()
-
-            revenue_growth = self.calculate_growth(prev_revenue, today_revenue)
-            order_growth = self.calculate_growth(prev_orders, today_orders)
-            profit_growth = self.calculate_growth(prev_profit, today_profit)
-            customer_growth = 0
-
-            profit_margin = self.calculate_profit_margin(
-                today_revenue, today_profit)
-
-            recent_sales = self.get_recent_sales(current_payments)
-            top_products = self.get_top_products(current_payments)
-            hourly_revenue = self.get_hourly_revenue(current_payments, period)
-
             return Response({
                 "status": "1",
-                "response": {
-                    "today_revenue": int(today_revenue),
-                    "today_orders": today_orders,
-                    "today_profit": today_profit,
-                    "today_customers": today_customers,
-                    "new_customers": new_customers,
-                    "profit_margin": float(profit_margin),
-                    "revenue_growth": float(revenue_growth),
-                    "order_growth": float(order_growth),
-                    "profit_growth": float(profit_growth),
-                    "customer_growth": float(customer_growth),
-                    "revenue_comparison": int(today_revenue) - int(prev_revenue),
-                    "order_comparison": today_orders - prev_orders,
-                    "recent_sales": recent_sales,
-                    "top_products": top_products,
-                    "hourly_revenue": hourly_revenue,
-                }
+                "response": response
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -89,8 +46,63 @@ class GetDashboardView(APIView):
                 "error_message": f"System error: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_summary(self, period, start_date, end_date, prev_start, prev_end):
+        current_payments = Payment.objects.filter(
+            is_active=True,
+            status='paid',
+            created_at__gte=start_date,
+            created_at__lte=end_date
+        )
+
+        windows = compare_periods(
+            (start_date, end_date), (prev_start, prev_end))
+        current = windows['current']
+        previous = windows['previous']
+
+        today_revenue = current['revenue']
+        today_orders = current['orders']
+        today_profit = current['profit']
+        today_customers = current['customers']
+        new_customers = current['known_customers']
+
+        prev_revenue = previous['revenue']
+        prev_orders = previous['orders']
+        prev_profit = previous['profit']
+
+        revenue_growth = calculate_growth(prev_revenue, today_revenue)
+        order_growth = calculate_growth(prev_orders, today_orders)
+        profit_growth = calculate_growth(prev_profit, today_profit)
+        customer_growth = calculate_growth(
+            previous['customers'], today_customers)
+
+        profit_margin = calculate_profit_margin(
+            today_revenue, today_profit)
+
+        recent_sales = self.get_recent_sales(current_payments)
+        top_products = self.get_top_products(current_payments)
+        hourly_revenue = self.get_hourly_revenue(
+            period, start_date, end_date)
+
+        return {
+            "today_revenue": int(today_revenue),
+            "today_orders": today_orders,
+            "today_profit": today_profit,
+            "today_customers": today_customers,
+            "new_customers": new_customers,
+            "profit_margin": float(profit_margin),
+            "revenue_growth": float(revenue_growth),
+            "order_growth": float(order_growth),
+            "profit_growth": float(profit_growth),
+            "customer_growth": float(customer_growth),
+            "revenue_comparison": int(today_revenue) - int(prev_revenue),
+            "order_comparison": today_orders - prev_orders,
+            "recent_sales": recent_sales,
+            "top_products": top_products,
+            "hourly_revenue": hourly_revenue,
+        }
+
     def get_date_range(self, period):
-        today = now()
+        today = store_now()
 
         if period == 'today':
             start_date = today.replace(
@@ -115,10 +127,10 @@ class GetDashboardView(APIView):
     def get_previous_date_range(self, period, current_start):
         if period == 'today':
             prev_start = current_start - timedelta(days=1)
-            prev_end = current_start - timedelta(seconds=1)
+            prev_end = current_start
         elif period == 'week':
             prev_start = current_start - timedelta(days=7)
-            prev_end = current_start - timedelta(seconds=1)
+            prev_end = current_start
         elif period == 'month':
             if current_start.month == 1:
                 prev_start = current_start.replace(
@@ -126,148 +138,87 @@ class GetDashboardView(APIView):
             else:
                 prev_start = current_start.replace(
                     month=current_start.month - 1, day=1)
-            prev_end = current_start - timedelta(seconds=1)
+            prev_end = current_start
         else:
             prev_start = current_start - timedelta(days=1)
-            prev_end = current_start - timedelta(seconds=1)
+            prev_end = current_start
 
         return prev_start, prev_end
 
-    def calculate_total_profit(self, payments):
-        total_profit = 0
-        for payment in payments:
-            if payment.items:
-                try:
-                    items = json.loads(payment.items) if isinstance(
-                        payment.items, str) else payment.items
-                    for item in items:
-                        cost_price = float(item.get('cost_price', 0))
-                        price = float(item.get('price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        profit = (price - cost_price) * quantity
-                        total_profit += profit
-                except (json.JSONDecodeError, TypeError, ValueError):
-                    pass
-        return int(total_profit)
-
-    def calculate_growth(self, previous, current):
-        if previous == 0:
-            return 100 if current > 0 else 0
-        return ((current - previous) / previous) * 100
-
-    def calculate_profit_margin(self, revenue, profit):
-        if revenue == 0:
-            return 0
-        return (profit / revenue) * 100
-
     def get_recent_sales(self, payments):
-        sales = payments.order_by('-created_at')[:10]
+        sales = payments.order_by('-created_at').values(
+            'order_code', 'created_at', 'buyer_name', 'amount', 'status'
+        )[:10]
         return [
             {
-                'order_code': payment.order_code,
-                'created_at': payment.created_at.isoformat(),
-                'buyer_name': payment.buyer_name or 'Khách lẻ',
-                'amount': int(payment.amount),
-                'status': payment.status
+                'order_code': payment['order_code'],
+                'created_at': payment['created_at'].isoformat(),
+                'buyer_name': payment['buyer_name'] or 'Khách lẻ',
+                'amount': int(payment['amount']),
+                'status': payment['status']
             }
             for payment in sales
         ]
 
     def get_top_products(self, payments):
-        product_sales = {}
-
-        for payment in payments:
-            if payment.items:
-                try:
-                    items = json.loads(payment.items) if isinstance(
-                        payment.items, str) else payment.items
-                    for item in items:
-                        sku = item.get('sku', 'unknown')
-                        name = item.get('name', '')
-                        quantity = int(item.get('quantity', 0))
-                        price = float(item.get('price', 0))
-
-                        if sku not in product_sales:
-                            product_sales[sku] = {
-                                'name': name,
-                                'quantity': 0,
-                                'revenue': 0
-                            }
-
-                        product_sales[sku]['quantity'] += quantity
-                        product_sales[sku]['revenue'] += int(quantity * price)
-                except (json.JSONDecodeError, TypeError, ValueError):
-                    pass
-
-        sorted_products = sorted(
-            product_sales.values(),
-            key=lambda x: x['revenue'],
-            reverse=True
-        )[:10]
-
-        return sorted_products
-
-    def get_hourly_revenue(self, payments, period):
-        revenue_data = []
-
-        if period == 'today':
-            hourly_revenue = {}
-            for hour in range(24):
-                hourly_revenue[hour] = 0
-
-            for payment in payments:
-                hour = payment.created_at.hour
-                hourly_revenue[hour] += int(payment.amount)
-
-            revenue_data = [
-                {
-                    'hour': hour,
-                    'revenue': amount
-                }
-                for hour, amount in sorted(hourly_revenue.items())
-            ]
-
-        elif period == 'week':
-            daily_revenue = {}
-            start_date = now() - timedelta(days=now().weekday())
+        product_sales = PaymentItem.objects.filter(
+            payment__in=payments
+        ).values('sku').annotate(
+            product_name=Max('name'),
+            total_quantity=Sum('quantity'),
+            revenue=Sum(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=19, decimal_places=2)
+            )
+        ).order_by('-revenue')[:10]
 
-            for i in range(7):
-                date = (start_date + timedelta(days=i)).date()
-                daily_revenue[date] = 0
+        return [
+            {
+                'name': row['product_name'],
+                'quantity': row['total_quantity'],
+                'revenue': int(row['revenue'] or 0)
+            }
+            for row in product_sales
+        ]
 
-            for payment in payments:
-                date = payment.created_at.date()
-                if date in daily_revenue:
-                    daily_revenue[date] += int(payment.amount)
-
-            revenue_data = [
-                {
-                    'date': date.isoformat(),
-                    'revenue': amount
-                }
-                for date, amount in sorted(daily_revenue.items())
-            ]
+    def get_hourly_revenue(self, period, start_date, end_date):
+        prev_start, _ = self.get_previous_date_range(period, start_date)
 
+        if period == 'week':
+            start = start_date.date()
+            series = bucket_series(
+                DAY,
+                (start, start + timedelta(days=6)),
+                (prev_start.date(), start - timedelta(days=1))
+            )
         elif period == 'month':
-            daily_revenue = {}
-            start_date = now().replace(day=1)
-            current_date = start_date
-
-            while current_date.month == start_date.month:
-                daily_revenue[current_date.date()] = 0
-                current_date += timedelta(days=1)
-
-            for payment in payments:
-                date = payment.created_at.date()
-                if date in daily_revenue:
-                    daily_revenue[date] += int(payment.amount)
-
-            revenue_data = [
+            start = start_date.date()
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            series = bucket_series(
+                DAY,
+                (start, end),
+                (prev_start.date(), start - timedelta(days=1))
+            )
+        else:
+            series = bucket_series(
+                HOUR,
+                (start_date, start_date + timedelta(hours=23)),
+                (prev_start, prev_start + timedelta(hours=23))
+            )
+            return [
                 {
-                    'date': date.isoformat(),
-                    'revenue': amount
+                    'hour': localtime(point['bucket'], store_timezone()).hour,
+                    'revenue': point['revenue'],
+                    'previous_revenue': point['previous_revenue']
                 }
-                for date, amount in sorted(daily_revenue.items())
+                for point in series
             ]
 
-        return revenue_data
+        return [
+            {
+                'date': point['bucket'].isoformat(),
+                'revenue': point['revenue'],
+                'previous_revenue': point['previous_revenue']
+            }
+            for point in series
+        ]
@@ -2,12 +2,17 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Q
 from django.contrib.auth.models import User
 import json
-from product.models import Product
-from payments.models import Payment
-from debit.models import Customer
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from ..search import search_all
 
 class GetUserProfile(APIView):
     permission_classes = [IsAuthenticated]
@@ -32,50 +37,60 @@ class GetUserProfile(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class QuickSearch(APIView):
-    permission_classes = [IsAuthenticated]
+def authenticate(request):
+    """Run the DRF authenticators for a plain Django view."""
+    drf_request = Request(request, authenticators=[
+        authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        user = drf_request.user
+    except APIException:
+        return None
+    return user if user and user.is_authenticated else None
+
+
+class QuickSearch(View):
+    """
+    Async so the product, order and customer lookups run concurrently;
+    sources slower than QUICK_SEARCH_DEADLINE_MS are left out and listed
+    in `timed_out`.
+    """
+
+    async def get(self, request):
+        user = await sync_to_async(authenticate)(request)
+        if user is None:
+            return JsonResponse({
+                "detail": "Authentication credentials were not provided."
+            }, status=status.HTTP_401_UNAUTHORIZED)
 
-    def get(self, request):
         try:
-            query = request.query_params.get('q', '').strip()
+            query = request.GET.get('q', '').strip()
 
             if not query or len(query) < 2:
-                return Response({
+                return JsonResponse({
                     "status": "1",
                     "response": {
                         "products": [],
                         "orders": [],
                         "customers": [],
+                        "timed_out": [],
                     }
                 }, status=status.HTTP_200_OK)
 
-            products = Product.objects.filter(
-                Q(is_active=True),
-                Q(name__icontains=query) | Q(sku__icontains=query)
-            ).values('id', 'name', 'sku', 'bar_code', 'price')[:5]
-
-            payments = Payment.objects.filter(
-                Q(is_active=True),
-                Q(order_code__icontains=query) | Q(buyer_name__icontains=query)
-            ).values('id', 'order_code', 'amount', 'buyer_name', 'created_at')[:5]
-
-            customers = Customer.objects.filter(
-                Q(is_active=True),
-                Q(name__icontains=query) | Q(phone__icontains=query) | Q(
-                    customer_code__icontains=query)
-            ).values('id', 'customer_code', 'name', 'phone')[:5]
-
-            return Response({
+            results, timed_out = await search_all(query, settings.QUICK_SEARCH_DEADLINE_MS / 1000)
+            return JsonResponse({
                 "status": "1",
                 "response": {
-                    "products": list(products),
-                    "orders": list(payments),
-                    "customers": list(customers),
+                    "products": results['products'],
+                    "orders": results['orders'],
+                    "customers": results['customers'],
+                    "timed_out": timed_out,
                 }
-            }, status=status.HTTP_200_OK)
+            # DRF's encoder, so prices and amounts stay JSON numbers.
+            }, status=status.HTTP_200_OK, encoder=JSONEncoder)
 
         except Exception as e:
-            return Response({
+            return JsonResponse({
                 "status": "9999",
                 "error_message": f"System error: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,64 @@
+import logging
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# unaccent() is only STABLE, so index expressions go through an IMMUTABLE
+# wrapper with the dictionary pinned.
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+# Same expressions as home.search.search_key().
+INDEXES = {
+    'product_search_trgm_idx': ('product', ('name', 'sku', 'bar_code')),
+    'payment_search_trgm_idx': ('payment', ('order_code', 'buyer_name')),
+    'customer_search_trgm_idx': ('customer', ('name', 'phone', 'customer_code')),
+}
+
+
+def search_key(columns):
+    joined = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"f_unaccent(lower({joined}))"
+
+
+def create_search_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_available_extensions WHERE name IN ('pg_trgm', 'unaccent')"
+        )
+        if cursor.fetchone()[0] < 2:
+            # QuickSearch falls back to icontains matching.
+            logger.warning("pg_trgm/unaccent are not available; skipping search indexes")
+            return
+
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        cursor.execute(CREATE_FUNCTION)
+        for name, (table, columns) in INDEXES.items():
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+                f"USING gin (({search_key(columns)}) gin_trgm_ops) WHERE is_active"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for name in INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        cursor.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_product_list_indexes'),
+        ('payments', '0007_hot_query_indexes'),
+        ('debit', '0002_debit_due_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
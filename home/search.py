@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.db.models import F, Q, TextField
+from django.db.models.expressions import RawSQL
+from product.models import Product
+from payments.models import Payment
+from debit.models import Customer
+
+logger = logging.getLogger(__name__)
+
+# Each source is searched on one lower-cased, accent-stripped key built from
+# its columns. The expression must stay identical to the one in
+# home/migrations/0001_search_indexes.py for the GIN trigram index to be used.
+SOURCES = {
+    'products': (Product, ('name', 'sku', 'bar_code'), ('id', 'name', 'sku', 'bar_code', 'price')),
+    'orders': (Payment, ('order_code', 'buyer_name'), ('id', 'order_code', 'amount', 'buyer_name', 'created_at')),
+    'customers': (Customer, ('name', 'phone', 'customer_code'), ('id', 'customer_code', 'name', 'phone')),
+}
+
+
+def search_key(columns):
+    joined = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"f_unaccent(lower({joined}))"
+
+
+def fold(text):
+    """Lower-case `text` and strip Vietnamese diacritics, as unaccent() does."""
+    text = text.lower().replace('đ', 'd')
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', text)
+        if not unicodedata.combining(char)
+    )
+
+
+@lru_cache
+def trigram_search_enabled(alias='default'):
+    """True once the search migration could install pg_trgm, unaccent and f_unaccent()."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL "
+            "AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+        )
+        return cursor.fetchone()[0]
+
+
+def search(source, query, limit=5):
+    """
+    Best `limit` matches of `query` in one source, most relevant first.
+    Matches are accent-insensitive ("ca chua" finds "cà chua") and tolerate
+    small typos through trigram word similarity; substrings of three or
+    more characters (codes, phone numbers) always match.
+    """
+    model, columns, fields = SOURCES[source]
+    rows = model.objects.filter(is_active=True)
+
+    if not trigram_search_enabled():
+        # Without pg_trgm there is no index to serve fuzzy matching.
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f"{column}__icontains": query})
+        return list(rows.filter(condition).values(*fields)[:limit])
+
+    folded = fold(query)
+    matches = Q(search_key__trigram_word_similar=folded)
+    if len(folded) >= 3:
+        matches |= Q(search_key__contains=folded)
+    rows = rows.annotate(
+        search_key=RawSQL(search_key(columns), [], output_field=TextField())
+    ).filter(matches).annotate(
+        rank=TrigramWordSimilarity(folded, F('search_key'))
+    )
+    return list(rows.order_by('-rank', '-id').values(*fields)[:limit])
+
+
+# Sources are queried from these threads, each with its own connection, so
+# the lookups of one request run concurrently. The pool size bounds the
+# connections QuickSearch can hold per process.
+_pool = ThreadPoolExecutor(
+    max_workers=settings.QUICK_SEARCH_WORKERS, thread_name_prefix='quick-search')
+
+QUERY_CANCELED = '57014'
+
+
+def search_within(source, query, timeout_ms):
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # The database gives up at the deadline too, so an abandoned
+                # lookup does not keep its thread and connection busy.
+                cursor.execute("SET LOCAL statement_timeout = %s", [timeout_ms])
+            return search(source, query)
+    except DatabaseError:
+        connection.close_if_unusable_or_obsolete()
+        raise
+
+
+async def search_all(query, deadline):
+    """
+    Search every source concurrently. Returns (results, timed_out): sources
+    that miss the `deadline` (seconds) get an empty list and are named in
+    `timed_out` so the caller can show what it has.
+    """
+    timeout_ms = max(1, int(deadline * 1000))
+    lookup = sync_to_async(search_within, thread_sensitive=False, executor=_pool)
+
+    async def run(source):
+        try:
+            return await asyncio.wait_for(lookup(source, query, timeout_ms), deadline)
+        except asyncio.TimeoutError:
+            pass
+        except OperationalError as ex:
+            if getattr(ex.__cause__, 'pgcode', None) != QUERY_CANCELED:
+                raise
+        logger.warning("Quick search of %s exceeded %sms", source, timeout_ms)
+        return None
+
+    found = await asyncio.gather(*(run(source) for source in SOURCES))
+    results = {source: rows or [] for source, rows in zip(SOURCES, found)}
+    return results, [source for source, rows in zip(SOURCES, found) if rows is None]
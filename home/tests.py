@@ -1,3 +1,155 @@
-from django.test import TestCase
+import json
+import time
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User
+from product.models import Category, Product
+from . import search as search_module
+from .search import fold, search, trigram_search_enabled
 
-# Create your tests here.
+
+class FoldTests(SimpleTestCase):
+
+    def test_strips_case_and_vietnamese_diacritics(self):
+        self.assertEqual(fold("Cà Chua Đà Lạt"), "ca chua da lat")
+        self.assertEqual(fold("SỮA TƯƠI"), "sua tuoi")
+        self.assertEqual(fold("đường"), "duong")
+        self.assertEqual(fold("8930001"), "8930001")
+
+
+class SearchTestData:
+
+    def setUp(self):
+        category = Category.objects.create(name="Rau")
+        for i, (name, is_active) in enumerate([
+                ("Cà chua Đà Lạt", True), ("Cà chua bi", True),
+                ("Dưa chuột", True), ("Cà chua cũ", False)]):
+            Product.objects.create(
+                name=name, sku=f"RAU-{i}", bar_code=f"89300{i}", category_id=category,
+                unit="kg", price=20000, cost_price=15000, is_active=is_active)
+
+    def names(self, query, limit=5):
+        return [row['name'] for row in search('products', query, limit)]
+
+
+class FallbackSearchTests(SearchTestData, TestCase):
+    """Without pg_trgm/unaccent, search is a case-insensitive substring match."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search_module, 'trigram_search_enabled', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matches_substrings_of_any_column(self):
+        self.assertEqual(sorted(self.names("cà chua")), ["Cà chua bi", "Cà chua Đà Lạt"])
+        self.assertEqual(self.names("RAU-2"), ["Dưa chuột"])
+        self.assertEqual(self.names("893001"), ["Cà chua bi"])
+
+    def test_respects_the_limit(self):
+        self.assertEqual(len(self.names("rau", limit=2)), 2)
+
+
+class RankedSearchTests(SearchTestData, TestCase):
+
+    def setUp(self):
+        if not trigram_search_enabled():
+            self.skipTest("pg_trgm/unaccent are not installed")
+        super().setUp()
+
+    def test_ignores_accents_and_ranks_closest_first(self):
+        self.assertEqual(self.names("ca chua da lat")[0], "Cà chua Đà Lạt")
+        self.assertEqual(sorted(self.names("ca chua")), ["Cà chua bi", "Cà chua Đà Lạt"])
+
+    def test_tolerates_small_typos(self):
+        self.assertIn("Dưa chuột", self.names("dua chuot"))
+        self.assertIn("Dưa chuột", self.names("dua chuott"))
+
+
+def index_scans(plan):
+    """Names of the indexes a plan reads."""
+    names = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        names.extend(index_scans(child))
+    return names
+
+
+class SearchPlanTests(SearchTestData, TestCase):
+    """Every source is served by its GIN trigram index from home/migrations/0001_search_indexes.py."""
+
+    INDEXES = {
+        'products': 'product_search_trgm_idx',
+        'orders': 'payment_search_trgm_idx',
+        'customers': 'customer_search_trgm_idx',
+    }
+
+    def setUp(self):
+        if not trigram_search_enabled():
+            self.skipTest("pg_trgm/unaccent are not installed")
+        super().setUp()
+
+    def test_lookups_use_the_trigram_index(self):
+        for source, index in self.INDEXES.items():
+            for query in ("ca chua", "ca"):
+                with self.subTest(source=source, query=query):
+                    with CaptureQueriesContext(connection) as context:
+                        search(source, query)
+                    with connection.cursor() as cursor:
+                        # A table this small would otherwise be read in full.
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                        cursor.execute(f"EXPLAIN (FORMAT JSON) {context.captured_queries[-1]['sql']}")
+                        plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    self.assertIn(index, index_scans(plan[0]['Plan']))
+
+
+def fake_search_within(source, query, timeout_ms):
+    if source == 'orders':
+        # Slower than any deadline used below.
+        time.sleep(0.5)
+    return [{'id': 1, 'name': query, 'price': Decimal('473000.00')}]
+
+
+@override_settings(QUICK_SEARCH_DEADLINE_MS=100)
+@mock.patch.object(search_module, 'search_within', fake_search_within)
+class QuickSearchViewTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('0911111111', password=None)
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {AccessToken.for_user(user)}"}
+
+    def test_requires_a_token(self):
+        response = self.client.get('/api/home/quick/search/', {'q': 'sua'})
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(
+            '/api/home/quick/search/', {'q': 'sua'}, HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, 401)
+
+    def test_returns_what_finished_before_the_deadline(self):
+        response = self.client.get('/api/home/quick/search/', {'q': 'sua'}, **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['response']
+        self.assertEqual(data['timed_out'], ['orders'])
+        self.assertEqual(data['orders'], [])
+        self.assertEqual(data['customers'], [{'id': 1, 'name': 'sua', 'price': 473000.0}])
+
+    def test_decimals_are_json_numbers(self):
+        response = self.client.get('/api/home/quick/search/', {'q': 'sua'}, **self.auth)
+
+        self.assertIsInstance(response.json()['response']['products'][0]['price'], float)
+
+    def test_short_queries_return_the_same_shape(self):
+        for query in ('', 's'):
+            with self.subTest(query=query):
+                response = self.client.get('/api/home/quick/search/', {'q': query}, **self.auth)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['response'], {
+                    'products': [], 'orders': [], 'customers': [], 'timed_out': []})
@@ -3,12 +3,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
-import json
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from product.models import Product
+from accounts.outbox import notify_reorder, publish
+from product.services import deduct_stock
+from report.rollups import record_paid_payment
 from ..models import Payment
-import time
+from ..line_items import record_line_items
+from ..order_code import next_order_code
 
 
 class CashPaymentView(APIView):
@@ -29,38 +29,22 @@ class CashPaymentView(APIView):
         payment_method = payload.get("payment_method", "cash")
 
         with transaction.atomic():
-            order_code = f"CASH{int(time.time() * 1000)}"
+            order_code = f"CASH{next_order_code()}"
 
             payment = Payment.objects.create(
                 order_code=order_code,
                 amount=amount,
                 description=f"Thanh toán tiền mặt - {order_code}",
                 status="paid",
-                items=json.dumps(items),
+                items=items,
                 transaction_id=order_code
             )
+            record_line_items(payment, items)
 
-            list_product_reorder = []
+            list_product_reorder = deduct_stock(items, reference=order_code)
+            record_paid_payment(payment)
 
-            for item in items:
-                bar_code = item.get('bar_code') or item.get('sku')
-                quantity = item.get('quantity', 0)
-
-                if bar_code:
-                    try:
-                        product = Product.objects.get(bar_code=bar_code)
-                        product.stock_quantity = max(
-                            0, product.stock_quantity - quantity)
-
-                        if product.stock_quantity <= product.reorder_point:
-                            list_product_reorder.append(product.bar_code)
-
-                        product.save()
-                    except Product.DoesNotExist:
-                        pass
-
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
+            publish(
                 "broadcast",
                 {
                     "type": "payment_success",
@@ -73,18 +57,7 @@ class CashPaymentView(APIView):
                 }
             )
 
-            if list_product_reorder:
-                async_to_sync(channel_layer.group_send)(
-                    "broadcast",
-                    {
-                        "type": "message",
-                        "data": {
-                            'message_type': 'remind_reorder',
-                            "items": list_product_reorder,
-                            "message": "Sản phẩm gần sắp hết"
-                        }
-                    }
-                )
+            notify_reorder(list_product_reorder)
 
             return Response({
                 'status': '1',
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.utils import timezone
+from product.services import deduct_stock
+from report.rollups import record_paid_payment
+from .models import Payment, WebhookEvent
+from .notifications import announce_payment_paid
+from .reservations import Status as ReservationStatus, release_reservations
+from .utils import decode_items
+
+MAX_ATTEMPTS = 5
+
+
+class WebhookEventError(Exception):
+    pass
+
+
+def enqueue_event(data, code):
+    # A replayed delivery hits the unique (order_code, payment_link_id)
+    # constraint and is dropped here, before any stock is touched.
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            order_code=str(data.get("orderCode")),
+            payment_link_id=data.get("paymentLinkId") or '',
+            code=code or '',
+            payload=data,
+        )
+    ], ignore_conflicts=True)
+
+
+def process_pending_events(batch_size=100):
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.Status.PENDING)
+            .order_by('id')[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    apply_event(event)
+            except Exception as ex:
+                event.last_error = str(ex)
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = WebhookEvent.Status.FAILED
+                continue
+            event.status = WebhookEvent.Status.PROCESSED
+            event.processed_at = timezone.now()
+            event.last_error = ''
+
+        WebhookEvent.objects.bulk_update(
+            events, ['status', 'attempts', 'last_error', 'processed_at'])
+    return len(events)
+
+
+def apply_event(event):
+    payment = Payment.objects.select_for_update().filter(
+        order_code=event.order_code).first()
+    if not payment:
+        raise WebhookEventError(f"Order {event.order_code} not found")
+
+    # The payment row lock plus this check makes the stock deduction
+    # happen once per order even if PayOS sends a new paymentLinkId.
+    if payment.status == "paid":
+        return
+
+    list_product_reorder = []
+    if event.code == "00":
+        payment.status = "paid"
+        # The held units become the sale; a hold that already expired is
+        # simply gone and the sale takes whatever stock is left.
+        release_reservations(payment, ReservationStatus.COMMITTED)
+        list_product_reorder = deduct_stock(
+            decode_items(payment.items), reference=payment.order_code)
+    else:
+        payment.status = "failed"
+        release_reservations(payment)
+
+    if event.payment_link_id:
+        payment.transaction_id = event.payment_link_id
+
+    payment.save()
+    if payment.status == "paid":
+        record_paid_payment(payment)
+        announce_payment_paid(payment, list_product_reorder)
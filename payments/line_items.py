@@ -0,0 +1,80 @@
+from decimal import Decimal, InvalidOperation
+from product.models import Product
+from .models import Payment, PaymentItem
+from .utils import decode_items
+
+
+def item_bar_code(item):
+    return item.get('bar_code') or item.get('sku') or ''
+
+
+def resolve_products(items):
+    bar_codes = {item_bar_code(item) for item in items} - {''}
+    if not bar_codes:
+        return {}
+    products = Product.objects.filter(bar_code__in=bar_codes).only(
+        'id', 'bar_code', 'sku', 'name', 'price', 'cost_price'
+    )
+    return {product.bar_code: product for product in products}
+
+
+def build_line_items(payment, items, products=None):
+    items = decode_items(items)
+    if products is None:
+        products = resolve_products(items)
+
+    line_items = []
+    for item in items:
+        bar_code = item_bar_code(item)
+        product = products.get(bar_code)
+        line_items.append(PaymentItem(
+            payment=payment,
+            product=product,
+            bar_code=bar_code,
+            sku=item.get('sku') or (product.sku if product else ''),
+            name=item.get('name') or (product.name if product else ''),
+            quantity=_to_int(item.get('quantity')),
+            unit_price=_to_decimal(
+                item.get('price'), product.price if product else 0),
+            unit_cost=_to_decimal(
+                item.get('cost_price'), product.cost_price if product else 0),
+        ))
+    return line_items
+
+
+def record_line_items(payment, items, replace=False):
+    if replace:
+        PaymentItem.objects.filter(payment=payment).delete()
+    line_items = build_line_items(payment, items)
+    if line_items:
+        PaymentItem.objects.bulk_create(line_items)
+    record_totals(payment, line_items)
+    return line_items
+
+
+def record_totals(payment, line_items):
+    payment.total_cost = sum(
+        (item.unit_cost * item.quantity for item in line_items), Decimal(0))
+    payment.total_profit = Decimal(payment.amount) - payment.total_cost
+    payment.item_count = sum(item.quantity for item in line_items)
+    Payment.objects.filter(pk=payment.pk).update(
+        total_cost=payment.total_cost,
+        total_profit=payment.total_profit,
+        item_count=payment.item_count
+    )
+
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_decimal(value, default):
+    if value in (None, ''):
+        return Decimal(default or 0)
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return Decimal(default or 0)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from payments.line_items import build_line_items, resolve_products
+from payments.models import Payment, PaymentItem
+from payments.utils import decode_items
+from report.cache import invalidate_all
+
+
+class Command(BaseCommand):
+    help = "Copy Payment.items JSON into the payment_item table for payments recorded before it existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = Payment.objects.filter(items__isnull=False).exclude(
+            Exists(PaymentItem.objects.filter(payment=OuterRef('pk')))
+        ).only('id', 'items').order_by('id')
+
+        migrated = 0
+        batch = []
+        for payment in pending.iterator(chunk_size=batch_size):
+            batch.append(payment)
+            if len(batch) >= batch_size:
+                migrated += self.migrate_batch(batch)
+                batch = []
+                self.stdout.write(f"Migrated {migrated} payments...")
+        if batch:
+            migrated += self.migrate_batch(batch)
+        if migrated:
+            # Top-product reports read payment_item; drop what they cached.
+            invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled line items for {migrated} payments"))
+
+    def migrate_batch(self, payments):
+        decoded = {payment.id: decode_items(payment.items) for payment in payments}
+        products = resolve_products(
+            [item for items in decoded.values() for item in items])
+
+        line_items = []
+        for payment in payments:
+            line_items.extend(
+                build_line_items(payment, decoded[payment.id], products))
+            payment.items = decoded[payment.id]
+
+        with transaction.atomic():
+            PaymentItem.objects.bulk_create(line_items, batch_size=1000)
+            Payment.objects.bulk_update(payments, ['items'], batch_size=1000)
+        return len(payments)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from payments.models import Payment
+from report.cache import invalidate_all
+
+BACKFILL_SQL = """
+    UPDATE payment AS p
+    SET total_cost = t.cost,
+        total_profit = p.amount - t.cost,
+        item_count = t.quantity
+    FROM (
+        SELECT p2.id,
+               COALESCE(SUM(i.quantity * i.unit_cost), 0) AS cost,
+               COALESCE(SUM(i.quantity), 0) AS quantity
+        FROM payment p2
+        LEFT JOIN payment_item i ON i.payment_id = p2.id
+        WHERE p2.id >= %s AND p2.id < %s
+        GROUP BY p2.id
+    ) AS t
+    WHERE p.id = t.id
+      AND (p.total_cost, p.total_profit, p.item_count)
+          IS DISTINCT FROM (t.cost, p.amount - t.cost, t.quantity)
+"""
+
+
+class Command(BaseCommand):
+    help = "Compute Payment.total_cost, total_profit and item_count from payment_item rows (run after backfill_payment_items)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = Payment.objects.aggregate(last=Max('id'))['last'] or 0
+
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(BACKFILL_SQL, [start, start + batch_size])
+                updated += cursor.rowcount
+            self.stdout.write(f"Updated {updated} payments...")
+        if updated:
+            # Reports read these columns; drop what they cached.
+            invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled totals for {updated} payments"))
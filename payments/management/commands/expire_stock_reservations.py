@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from payments.reservations import expire_reservations
+
+
+class Command(BaseCommand):
+    help = "Give back the stock held by PayOS payments that were never paid"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help="Seconds to sleep when nothing is overdue")
+        parser.add_argument('--once', action='store_true',
+                            help="Expire the overdue holds once and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            close_old_connections()
+            expired, payments = expire_reservations(batch_size)
+            if expired:
+                self.stdout.write(f"Expired {expired} stock holds and {payments} payments")
+
+            if expired < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from payments.inbox import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Apply verified PayOS webhook events from the inbox table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the inbox is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the inbox once and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            close_old_connections()
+            processed = process_pending_events(batch_size)
+            if processed:
+                self.stdout.write(f"Processed {processed} webhook events")
+
+            if processed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_items'),
+        ('product', '0003_rename_create_at_category_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('bar_code', models.CharField(db_index=True, max_length=64)),
+                ('sku', models.CharField(blank=True, default='', max_length=64)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('quantity', models.IntegerField(default=0)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='payments.payment')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_items', to='product.product')),
+            ],
+            options={
+                'db_table': 'payment_item',
+                'indexes': [models.Index(fields=['sku'], name='payment_ite_sku_a8c253_idx')],
+            },
+        ),
+    ]
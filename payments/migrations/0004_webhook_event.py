@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_payment_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('order_code', models.CharField(max_length=64)),
+                ('payment_link_id', models.CharField(blank=True, default='', max_length=128)),
+                ('code', models.CharField(blank=True, default='', max_length=16)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'webhook_event',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='webhook_event_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order_code', 'payment_link_id'), name='webhook_event_order_link_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_webhook_event'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE IF NOT EXISTS payment_order_code_seq START WITH 100000000 INCREMENT BY 1000",
+            reverse_sql="DROP SEQUENCE IF EXISTS payment_order_code_seq",
+        ),
+    ]
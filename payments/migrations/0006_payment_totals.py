@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_order_code_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='total_profit',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=19),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_payment_totals'),
+        ('product', '0003_rename_create_at_category_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentitem',
+            name='payment',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='payments.payment'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'paid')), fields=['created_at'], include=('amount', 'total_cost', 'total_profit', 'buyer_phone'), name='payment_paid_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentitem',
+            index=models.Index(fields=['payment', 'sku'], include=('quantity', 'unit_price', 'name'), name='payment_item_payment_sku_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_hot_query_indexes'),
+        ('product', '0007_product_reserved_quantity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('held', 'Held'), ('committed', 'Committed'), ('released', 'Released'), ('expired', 'Expired')], default='held', max_length=16)),
+                ('expires_at', models.DateTimeField()),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='payments.payment')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='product.product')),
+            ],
+            options={
+                'db_table': 'stock_reservation',
+                'indexes': [models.Index(condition=models.Q(('status', 'held')), fields=['expires_at'], name='stock_reservation_held_idx')],
+            },
+        ),
+    ]
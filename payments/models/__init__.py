@@ -1,2 +1,5 @@
 from .base import BaseModel
-from .payment import Payment
\ No newline at end of file
+from .payment import Payment
+from .payment_item import PaymentItem
+from .webhook_event import WebhookEvent
+from .stock_reservation import StockReservation
\ No newline at end of file
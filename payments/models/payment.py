@@ -10,6 +10,21 @@ class Payment(BaseModel):
     buyer_name = models.CharField(max_length=128, blank=True, null=True)
     buyer_phone = models.CharField(max_length=32, blank=True, null=True)
     items = models.JSONField(null=True, blank=True)
+    # Snapshot of the line items at sale time, so reports never depend on
+    # later edits to Product.cost_price.
+    total_cost = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    total_profit = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = 'payment'
+        indexes = [
+            # Every dashboard/report query reads paid, active payments by
+            # created_at range; the included columns allow index-only scans.
+            models.Index(
+                fields=['created_at'],
+                name='payment_paid_created_idx',
+                condition=models.Q(status='paid', is_active=True),
+                include=['amount', 'total_cost', 'total_profit', 'buyer_phone'],
+            ),
+        ]
@@ -0,0 +1,37 @@
+from .base import BaseModel
+from .payment import Payment
+from django.db import models
+
+class PaymentItem(BaseModel):
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name='line_items',
+        db_index=False
+    )
+    product = models.ForeignKey(
+        'product.Product',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payment_items'
+    )
+    bar_code = models.CharField(max_length=64, db_index=True)
+    sku = models.CharField(max_length=64, blank=True, default='')
+    name = models.CharField(max_length=255, blank=True, default='')
+    quantity = models.IntegerField(default=0)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'payment_item'
+        indexes = [
+            models.Index(fields=['sku']),
+            # Serves the payment_id foreign key and top-product rollups
+            # without visiting the heap.
+            models.Index(
+                fields=['payment', 'sku'],
+                name='payment_item_payment_sku_idx',
+                include=['quantity', 'unit_price', 'name'],
+            ),
+        ]
@@ -0,0 +1,38 @@
+from .base import BaseModel
+from .payment import Payment
+from django.db import models
+
+class StockReservation(BaseModel):
+
+    class Status(models.TextChoices):
+        HELD = 'held', 'Held'
+        COMMITTED = 'committed', 'Committed'
+        RELEASED = 'released', 'Released'
+        EXPIRED = 'expired', 'Expired'
+
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    product = models.ForeignKey(
+        'product.Product',
+        on_delete=models.PROTECT,
+        related_name='reservations',
+        db_index=False
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.HELD)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'stock_reservation'
+        indexes = [
+            # The expiry sweeper only ever looks at live holds.
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='held'),
+                name='stock_reservation_held_idx'
+            ),
+        ]
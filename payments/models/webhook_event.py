@@ -0,0 +1,35 @@
+from .base import BaseModel
+from django.db import models
+
+class WebhookEvent(BaseModel):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        PROCESSED = 'processed', 'Processed'
+        FAILED = 'failed', 'Failed'
+
+    order_code = models.CharField(max_length=64)
+    payment_link_id = models.CharField(max_length=128, blank=True, default='')
+    code = models.CharField(max_length=16, blank=True, default='')
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'webhook_event'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order_code', 'payment_link_id'],
+                name='webhook_event_order_link_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status='pending'),
+                name='webhook_event_pending_idx'
+            ),
+        ]
@@ -0,0 +1,38 @@
+from accounts.outbox import notify_reorder, publish
+
+
+def notify_payment_success(user_id: int, order_id: int, amount: int):
+    data = {
+        "orderId": order_id,
+        "amount": amount,
+        "message": "Thanh toán thành công",
+    }
+    publish(
+        f"user_{user_id}",
+        {
+            "type": "payment_success",
+            "data": data,
+        }
+    )
+
+
+def announce_payment_paid(payment, list_product_reorder):
+    user_id = getattr(payment, "user_id", None)
+    amount = getattr(payment, "amount", None)
+
+    if user_id:
+        notify_payment_success(
+            user_id=user_id, order_id=payment.order_code, amount=amount)
+    else:
+        publish(
+            "broadcast",
+            {
+                "type": "payment_success",
+                "data": {
+                    "orderId": payment.order_code,
+                    "amount": amount,
+                    "message": "Thanh toán thành công (broadcast)"
+                }
+            }
+        )
+    notify_reorder(list_product_reorder)
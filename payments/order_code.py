@@ -0,0 +1,50 @@
+import os
+import threading
+from django.db import connection
+
+ORDER_CODE_SEQUENCE = 'payment_order_code_seq'
+# Must match INCREMENT BY of the sequence created in migration 0005.
+ORDER_CODE_BLOCK_SIZE = 1000
+
+
+class OrderCodeAllocator:
+    """
+    Hands out unique numeric order codes from blocks reserved with one
+    nextval() per ORDER_CODE_BLOCK_SIZE codes. Blocks never overlap across
+    processes or hosts, so codes stay unique without a round trip per sale.
+    """
+
+    def __init__(self, sequence=ORDER_CODE_SEQUENCE, block_size=ORDER_CODE_BLOCK_SIZE):
+        self.sequence = sequence
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                start = self._reserve_block()
+                self._next, self._end = start, start + self.block_size
+            code = self._next
+            self._next += 1
+            return code
+
+    def reset(self):
+        # A forked worker must not keep handing out its parent's block.
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [self.sequence])
+            return cursor.fetchone()[0]
+
+
+allocator = OrderCodeAllocator()
+os.register_at_fork(after_in_child=allocator.reset)
+
+
+def next_order_code():
+    return allocator.next()
@@ -0,0 +1,204 @@
+import asyncio
+import random
+import time
+import httpx
+from decouple import config
+from Server.metrics import PAYOS_REQUEST_SECONDS
+from .utils import generate_signature
+
+PAYOS_BASE_URL = config("PAYOS_BASE_URL", default="https://api-merchant.payos.vn")
+PAYOS_CREATE_PATH = "/v2/payment-requests"
+
+CLIENT_ID = config("PAYOS_CLIENT_ID")
+API_KEY = config("PAYOS_API_KEY")
+CHECKSUM_KEY = config("PAYOS_CHECKSUM_KEY")
+
+PAYOS_TIMEOUT = config("PAYOS_TIMEOUT", default=10.0, cast=float)
+PAYOS_MAX_CONNECTIONS = config("PAYOS_MAX_CONNECTIONS", default=20, cast=int)
+PAYOS_MAX_CONCURRENCY = config("PAYOS_MAX_CONCURRENCY", default=10, cast=int)
+PAYOS_MAX_RETRIES = config("PAYOS_MAX_RETRIES", default=2, cast=int)
+PAYOS_RETRY_BACKOFF = config("PAYOS_RETRY_BACKOFF", default=0.2, cast=float)
+PAYOS_BREAKER_THRESHOLD = config("PAYOS_BREAKER_THRESHOLD", default=5, cast=int)
+PAYOS_BREAKER_COOLDOWN = config("PAYOS_BREAKER_COOLDOWN", default=30.0, cast=float)
+
+
+class PayOSError(Exception):
+    pass
+
+
+class PayOSUnavailable(PayOSError):
+    pass
+
+
+class RetryableStatus(PayOSError):
+    def __init__(self, response):
+        super().__init__(f"PayOS returned HTTP {response.status_code}")
+        self.response = response
+
+
+class CircuitBreaker:
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        # After the cooldown one request is let through to probe PayOS;
+        # a failure re-opens the breaker for another full cooldown.
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class PayOSClient:
+
+    def __init__(
+        self,
+        base_url=PAYOS_BASE_URL,
+        timeout=PAYOS_TIMEOUT,
+        max_connections=PAYOS_MAX_CONNECTIONS,
+        max_concurrency=PAYOS_MAX_CONCURRENCY,
+        max_retries=PAYOS_MAX_RETRIES,
+        retry_backoff=PAYOS_RETRY_BACKOFF,
+        breaker_threshold=PAYOS_BREAKER_THRESHOLD,
+        breaker_cooldown=PAYOS_BREAKER_COOLDOWN,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _get_client(self):
+        # httpx pools are bound to the event loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={
+                    "x-client-id": CLIENT_ID,
+                    "x-api-key": API_KEY,
+                    "Content-Type": "application/json"
+                },
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _post(self, operation, path, body):
+        if not self.breaker.allow():
+            PAYOS_REQUEST_SECONDS.labels(operation, 'circuit_open').observe(0)
+            raise PayOSUnavailable("PayOS circuit is open")
+
+        client = self._get_client()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    try:
+                        resp = await client.post(path, json=body)
+                    except httpx.TransportError as ex:
+                        PAYOS_REQUEST_SECONDS.labels(operation, type(ex).__name__).observe(
+                            time.perf_counter() - started)
+                        raise
+                    PAYOS_REQUEST_SECONDS.labels(operation, f"{resp.status_code // 100}xx").observe(
+                        time.perf_counter() - started)
+                if resp.status_code >= 500:
+                    raise RetryableStatus(resp)
+                resp.raise_for_status()
+            except (httpx.TransportError, RetryableStatus) as ex:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    if isinstance(ex, RetryableStatus):
+                        raise PayOSError(str(ex)) from ex
+                    raise
+                attempt += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay))
+                continue
+            except httpx.HTTPStatusError:
+                # A 4xx is our request's fault, PayOS itself is healthy.
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return resp.json()
+
+    async def create_payment_request(self, order_code, amount, description, return_url, cancel_url, buyer=None, expired_at=None):
+        signature = generate_signature(
+            order_code, amount, description, return_url, cancel_url, CHECKSUM_KEY)
+
+        body = {
+            "orderCode": order_code,
+            "amount": amount,
+            "description": description,
+            "returnUrl": return_url,
+            "cancelUrl": cancel_url,
+            "signature": signature
+        }
+        if buyer:
+            body.update({
+                "buyerName": buyer.get("name"),
+                "buyerEmail": buyer.get("email"),
+                "buyerPhone": buyer.get("phone")
+            })
+        if expired_at:
+            body["expiredAt"] = expired_at
+
+        return await self._post('create', PAYOS_CREATE_PATH, body)
+
+    async def delete_payment(self, order_code):
+        if not order_code or not isinstance(order_code, str):
+            return
+        body = {
+            "cancellationReason": "Changed my mind"
+        }
+        return await self._post('cancel', f"{PAYOS_CREATE_PATH}/{order_code}/cancel", body)
+
+
+payos = PayOSClient()
+
+
+async def create_payment_request(order_code, amount, description, return_url, cancel_url, buyer=None, expired_at=None):
+    return await payos.create_payment_request(
+        order_code, amount, description, return_url, cancel_url, buyer=buyer, expired_at=expired_at)
+
+
+async def delete_payment(order_code):
+    return await payos.delete_payment(order_code)
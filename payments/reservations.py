@@ -0,0 +1,146 @@
+from django.db import connection, transaction
+from product.models import Product
+from product.services import basket_quantities
+from .models import StockReservation
+
+Status = StockReservation.Status
+
+
+class InsufficientStock(Exception):
+
+    def __init__(self, bar_codes):
+        super().__init__(f"Insufficient stock for {', '.join(bar_codes)}")
+        self.bar_codes = bar_codes
+
+
+def hold_stock(payment, items, expires_at):
+    """
+    Reserve the basket of a pending online payment until it is paid,
+    cancelled or `expires_at` passes. Raises InsufficientStock, reserving
+    nothing, when any product has fewer unreserved units than asked for.
+    Must run inside transaction.atomic().
+    """
+    quantities = basket_quantities(items)
+    if not quantities:
+        return []
+
+    # Same lock order as deduct_stock, so holds and counter sales of the
+    # same products queue instead of deadlocking.
+    products = list(
+        Product.objects.select_for_update()
+        .filter(bar_code__in=list(quantities))
+        .order_by('id')
+        .values_list('id', 'bar_code', 'stock_quantity', 'reserved_quantity')
+    )
+    short = [
+        bar_code for _, bar_code, stock, reserved in products
+        if stock - reserved < quantities[bar_code]
+    ]
+    if short:
+        raise InsufficientStock(short)
+    if not products:
+        return []
+
+    held = {product_id: quantities[bar_code] for product_id, bar_code, _, _ in products}
+    _change_reserved(held)
+
+    return StockReservation.objects.bulk_create([
+        StockReservation(payment=payment, product_id=product_id, quantity=quantity, expires_at=expires_at)
+        for product_id, quantity in held.items()
+    ])
+
+
+def release_reservations(payment, status=Status.RELEASED):
+    """
+    End the live holds of a payment: COMMITTED when it was paid (the sale
+    itself deducts the stock), RELEASED when it was cancelled or failed.
+    Returns the number of holds ended.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE stock_reservation
+                SET status = %s, updated_at = NOW()
+                WHERE payment_id = %s AND status = %s
+                RETURNING product_id, quantity
+                """,
+                [status, payment.pk, Status.HELD]
+            )
+            rows = cursor.fetchall()
+        _change_reserved(_totals(rows), sign=-1)
+    return len(rows)
+
+
+def expire_reservations(batch_size=1000):
+    """
+    Expire up to `batch_size` overdue holds, give their units back and mark
+    their still-pending payments expired, in one statement per table.
+    Returns (holds expired, payments expired).
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE stock_reservation AS r
+                SET status = %(expired)s, updated_at = NOW()
+                FROM (
+                    SELECT id FROM stock_reservation
+                    WHERE status = %(held)s AND expires_at <= NOW()
+                    ORDER BY expires_at
+                    LIMIT %(limit)s
+                    FOR UPDATE SKIP LOCKED
+                ) AS due
+                WHERE r.id = due.id
+                RETURNING r.payment_id, r.product_id, r.quantity
+                """,
+                {'expired': Status.EXPIRED, 'held': Status.HELD, 'limit': batch_size}
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return 0, 0
+            _change_reserved(_totals(row[1:] for row in rows), sign=-1)
+
+            # A payment locked here is being settled by the webhook worker,
+            # which decides its status; skip it rather than wait.
+            cursor.execute(
+                """
+                UPDATE payment
+                SET status = 'expired', updated_at = NOW()
+                WHERE id IN (
+                    SELECT id FROM payment
+                    WHERE id = ANY(%s) AND status = 'pending'
+                    FOR UPDATE SKIP LOCKED
+                )
+                """,
+                [list({row[0] for row in rows})]
+            )
+            return len(rows), cursor.rowcount
+
+
+def _totals(rows):
+    totals = {}
+    for product_id, quantity in rows:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    return totals
+
+
+def _change_reserved(quantities, sign=1):
+    if not quantities:
+        return
+    ids = sorted(quantities)
+    with connection.cursor() as cursor:
+        if sign < 0:
+            # hold_stock already holds these locks; everyone else takes them
+            # here, in id order.
+            cursor.execute(
+                "SELECT id FROM product WHERE id = ANY(%s) ORDER BY id FOR UPDATE", [ids])
+        cursor.execute(
+            """
+            UPDATE product AS p
+            SET reserved_quantity = GREATEST(0, p.reserved_quantity + change.quantity)
+            FROM unnest(%s::bigint[], %s::integer[]) AS change (id, quantity)
+            WHERE p.id = change.id
+            """,
+            [ids, [sign * quantities[product_id] for product_id in ids]]
+        )
@@ -1,3 +1,491 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection, connections
+from datetime import timedelta
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from product.models import Category, Product
+from . import payos_client
+from .inbox import process_pending_events
+from .models import Payment, PaymentItem, StockReservation, WebhookEvent
+from .order_code import next_order_code
+from .reservations import InsufficientStock, expire_reservations, hold_stock, release_reservations
+from .views import CHECKSUM_KEY
 
-# Create your tests here.
+
+class StubPayOSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server.requests.append({
+            "path": self.path,
+            "headers": dict(self.headers),
+            "body": body,
+            "client_port": self.client_address[1],
+        })
+        if server.on_request:
+            server.on_request(body)
+
+        status_code = server.statuses.pop(0) if server.statuses else 200
+        payload = json.dumps({
+            "code": "00",
+            "data": {
+                "paymentLinkId": f"link-{body.get('orderCode')}",
+                "checkoutUrl": "https://pay.example/checkout",
+                "qrCode": "qr-data",
+            }
+        }).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubPayOSMixin:
+
+    def start_stub(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubPayOSHandler)
+        self.server.requests = []
+        self.server.statuses = []
+        self.server.on_request = None
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def make_client(self, base_url, **kwargs):
+        kwargs.setdefault("retry_backoff", 0)
+        return payos_client.PayOSClient(base_url=base_url, **kwargs)
+
+
+class PayOSClientTests(StubPayOSMixin, SimpleTestCase):
+
+    def setUp(self):
+        self.base_url = self.start_stub()
+
+    def test_create_payment_request_sends_signed_body(self):
+        client = self.make_client(self.base_url)
+
+        async def run():
+            try:
+                return await client.create_payment_request(
+                    1001, 50000, "Order 1001", "https://r", "https://c")
+            finally:
+                await client.aclose()
+
+        result = async_to_sync(run)()
+
+        self.assertEqual(result["data"]["paymentLinkId"], "link-1001")
+        request = self.server.requests[0]
+        self.assertEqual(request["path"], payos_client.PAYOS_CREATE_PATH)
+        self.assertEqual(request["body"]["amount"], 50000)
+        self.assertIn("signature", request["body"])
+
+    def test_connections_are_kept_alive_between_calls(self):
+        client = self.make_client(self.base_url)
+
+        async def run():
+            try:
+                for order_code in range(5):
+                    await client.create_payment_request(
+                        order_code, 1000, "x", "https://r", "https://c")
+            finally:
+                await client.aclose()
+
+        async_to_sync(run)()
+
+        ports = {request["client_port"] for request in self.server.requests}
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(ports), 1)
+
+    def test_server_errors_are_retried(self):
+        self.server.statuses = [503, 502]
+        client = self.make_client(self.base_url, max_retries=2)
+
+        async def run():
+            try:
+                return await client.create_payment_request(
+                    7, 1000, "x", "https://r", "https://c")
+            finally:
+                await client.aclose()
+
+        result = async_to_sync(run)()
+
+        self.assertEqual(result["code"], "00")
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        self.server.statuses = [503] * 10
+        client = self.make_client(
+            self.base_url, max_retries=0, breaker_threshold=2, breaker_cooldown=60)
+
+        async def run():
+            try:
+                for _ in range(2):
+                    with self.assertRaises(payos_client.PayOSError):
+                        await client.create_payment_request(
+                            1, 1000, "x", "https://r", "https://c")
+                with self.assertRaises(payos_client.PayOSUnavailable):
+                    await client.create_payment_request(
+                        1, 1000, "x", "https://r", "https://c")
+            finally:
+                await client.aclose()
+
+        async_to_sync(run)()
+
+        self.assertTrue(client.breaker.is_open)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+class CreatePaymentViewTests(StubPayOSMixin, TransactionTestCase):
+
+    def setUp(self):
+        base_url = self.start_stub()
+        patcher = mock.patch.object(
+            payos_client, "payos", self.make_client(base_url))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pending_payment_is_committed_before_payos_call(self):
+        seen = {}
+
+        def check_committed(body):
+            seen["committed"] = Payment.objects.filter(
+                order_code=str(body["orderCode"]), status="pending").exists()
+            connection.close()
+
+        self.server.on_request = check_committed
+
+        response = self.client.post(
+            "/api/payments/create/",
+            data=json.dumps({
+                "orderCode": "5001",
+                "amount": 20000,
+                "description": "Order 5001",
+                "returnUrl": "https://r",
+                "cancelUrl": "https://c",
+                "items": [],
+            }),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"]["transactionId"], "link-5001")
+        self.assertTrue(seen["committed"])
+        payment = Payment.objects.get(order_code="5001")
+        self.assertEqual(payment.transaction_id, "link-5001")
+
+    def test_paid_order_is_not_sent_to_payos(self):
+        Payment.objects.create(order_code="5002", amount=1000, status="paid")
+
+        response = self.client.post(
+            "/api/payments/create/",
+            data=json.dumps({
+                "orderCode": "5002",
+                "amount": 1000,
+                "description": "Order 5002",
+                "returnUrl": "https://r",
+                "cancelUrl": "https://c",
+            }),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.server.requests, [])
+
+    def test_order_beyond_unreserved_stock_is_refused(self):
+        category = Category.objects.create(name="Rau")
+        Product.objects.create(
+            name="Cà chua", sku="CC01", bar_code="893001", category_id=category,
+            unit="kg", price=20000, cost_price=15000, stock_quantity=3, reserved_quantity=2)
+
+        response = self.client.post(
+            "/api/payments/create/",
+            data=json.dumps({
+                "orderCode": "5003",
+                "amount": 40000,
+                "description": "Order 5003",
+                "returnUrl": "https://r",
+                "cancelUrl": "https://c",
+                "items": [{"bar_code": "893001", "quantity": 2}],
+            }),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["items"], ["893001"])
+        self.assertFalse(Payment.objects.filter(order_code="5003").exists())
+        self.assertEqual(self.server.requests, [])
+
+    def test_payos_failure_releases_the_hold(self):
+        category = Category.objects.create(name="Rau")
+        product = Product.objects.create(
+            name="Cà chua", sku="CC01", bar_code="893001", category_id=category,
+            unit="kg", price=20000, cost_price=15000, stock_quantity=3)
+        self.server.statuses = [503] * 10
+
+        response = self.client.post(
+            "/api/payments/create/",
+            data=json.dumps({
+                "orderCode": "5004",
+                "amount": 40000,
+                "description": "Order 5004",
+                "returnUrl": "https://r",
+                "cancelUrl": "https://c",
+                "items": [{"bar_code": "893001", "quantity": 2}],
+            }),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 502)
+        product.refresh_from_db()
+        self.assertEqual(product.reserved_quantity, 0)
+        payment = Payment.objects.get(order_code="5004")
+        self.assertEqual(payment.status, "failed")
+        self.assertEqual(
+            StockReservation.objects.get(payment=payment).status, StockReservation.Status.RELEASED)
+
+
+class WebhookInboxTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Rau")
+        self.product = Product.objects.create(
+            name="Cà chua", sku="CC01", bar_code="893001", category_id=category,
+            unit="kg", price=20000, cost_price=15000, stock_quantity=10)
+        self.payment = Payment.objects.create(
+            order_code="9001", amount=40000, status="pending",
+            items=[{"bar_code": "893001", "quantity": 2}])
+
+    def post_webhook(self, payment_link_id="link-9001"):
+        data = {"orderCode": 9001, "amount": 40000, "paymentLinkId": payment_link_id}
+        canonical = "&".join(f"{key}={data[key]}" for key in sorted(data))
+        signature = hmac.new(
+            CHECKSUM_KEY.encode(), canonical.encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            "/api/payments/webhook/",
+            data=json.dumps({"code": "00", "data": data, "signature": signature}),
+            content_type="application/json",
+        )
+
+    def test_webhook_only_enqueues_the_event(self):
+        response = self.post_webhook()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "pending")
+
+    def test_replayed_delivery_deducts_stock_once(self):
+        self.post_webhook()
+        self.post_webhook()
+        self.post_webhook(payment_link_id="link-9001-retry")
+
+        while process_pending_events(batch_size=1):
+            pass
+
+        self.payment.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        self.assertEqual(self.product.stock_quantity, 8)
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+        self.assertFalse(
+            WebhookEvent.objects.exclude(status=WebhookEvent.Status.PROCESSED).exists())
+
+    def test_event_for_unknown_order_is_retried_then_failed(self):
+        WebhookEvent.objects.create(order_code="missing", code="00", payload={})
+
+        for _ in range(5):
+            process_pending_events()
+
+        event = WebhookEvent.objects.get(order_code="missing")
+        self.assertEqual(event.status, WebhookEvent.Status.FAILED)
+        self.assertEqual(event.attempts, 5)
+
+
+class StockReservationTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Rau")
+        self.product = Product.objects.create(
+            name="Cà chua", sku="CC01", bar_code="893001", category_id=category,
+            unit="kg", price=20000, cost_price=15000, stock_quantity=10)
+        self.items = [{"bar_code": "893001", "quantity": 4}]
+        self.payment = Payment.objects.create(
+            order_code="9101", amount=80000, status="pending", items=self.items)
+
+    def hold(self, payment, minutes=15):
+        return hold_stock(payment, payment.items, timezone.now() + timedelta(minutes=minutes))
+
+    def reserved(self):
+        self.product.refresh_from_db()
+        return self.product.reserved_quantity
+
+    def test_holds_block_overselling_until_released(self):
+        self.hold(self.payment)
+        other = Payment.objects.create(
+            order_code="9102", amount=140000, status="pending",
+            items=[{"bar_code": "893001", "quantity": 7}])
+
+        with self.assertRaises(InsufficientStock):
+            self.hold(other)
+        release_reservations(self.payment)
+        self.hold(other)
+
+        self.assertEqual(self.reserved(), 7)
+        self.assertEqual(self.product.stock_quantity, 10)
+
+    def test_paid_webhook_commits_the_hold(self):
+        self.hold(self.payment)
+        WebhookEvent.objects.create(order_code="9101", code="00", payload={})
+
+        process_pending_events()
+
+        self.assertEqual(self.reserved(), 0)
+        self.assertEqual(self.product.stock_quantity, 6)
+        self.assertEqual(
+            StockReservation.objects.get(payment=self.payment).status, StockReservation.Status.COMMITTED)
+
+    def test_sweeper_expires_overdue_holds_and_payments(self):
+        self.hold(self.payment, minutes=-1)
+        fresh = Payment.objects.create(
+            order_code="9103", amount=20000, status="pending",
+            items=[{"bar_code": "893001", "quantity": 1}])
+        self.hold(fresh)
+
+        self.assertEqual(expire_reservations(), (1, 1))
+        self.assertEqual(expire_reservations(), (0, 0))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "expired")
+        self.assertEqual(self.reserved(), 1)
+
+
+class LineItemTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Rau")
+        self.product = Product.objects.create(
+            name="Cà chua", sku="CC01", bar_code="893001", category_id=category,
+            unit="kg", price=20000, cost_price=15000, stock_quantity=10)
+
+    def test_paid_payment_gets_its_line_items(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(User.objects.create_user('0911111111', password=None))
+
+        response = client.post('/api/payments/cash/', {
+            "amount": 40000,
+            "items": [{"bar_code": "893001", "quantity": 2}],
+        }, format='json')
+
+        payment = Payment.objects.get(order_code=response.data['response']['orderCode'])
+        self.assertEqual(
+            list(PaymentItem.objects.filter(payment=payment).values_list(
+                'product', 'sku', 'name', 'quantity', 'unit_price', 'unit_cost')),
+            [(self.product.id, "CC01", "Cà chua", 2, 20000, 15000)])
+
+    def test_backfill_is_idempotent_and_drops_cached_reports(self):
+        Payment.objects.create(
+            order_code="B1", amount=40000, status="paid",
+            items=json.dumps([{"bar_code": "893001", "quantity": 2}]))
+        Payment.objects.create(order_code="B2", amount=1000, status="paid")
+
+        with mock.patch(
+                "payments.management.commands.backfill_payment_items.invalidate_all") as invalidate:
+            call_command("backfill_payment_items", stdout=mock.Mock())
+            call_command("backfill_payment_items", stdout=mock.Mock())
+
+        self.assertEqual(
+            list(PaymentItem.objects.values_list('payment__order_code', 'bar_code', 'quantity')),
+            [("B1", "893001", 2)])
+        # Only the run that wrote rows has anything to invalidate.
+        invalidate.assert_called_once_with()
+
+    def test_paid_payment_snapshots_its_totals(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(User.objects.create_user('0911111111', password=None))
+
+        response = client.post('/api/payments/cash/', {
+            "amount": 40000,
+            "items": [{"bar_code": "893001", "quantity": 2}],
+        }, format='json')
+        Product.objects.filter(pk=self.product.pk).update(cost_price=18000)
+
+        payment = Payment.objects.get(order_code=response.data['response']['orderCode'])
+        self.assertEqual(
+            (payment.total_cost, payment.total_profit, payment.item_count), (30000, 10000, 2))
+
+    def test_totals_backfill_is_idempotent_and_drops_cached_reports(self):
+        payment = Payment.objects.create(order_code="B1", amount=40000, status="paid")
+        PaymentItem.objects.create(
+            payment=payment, product=self.product, bar_code="893001", sku="CC01",
+            name="Cà chua", quantity=2, unit_price=20000, unit_cost=15000)
+        empty = Payment.objects.create(order_code="B2", amount=1000, status="paid")
+
+        with mock.patch(
+                "payments.management.commands.backfill_payment_totals.invalidate_all") as invalidate:
+            call_command("backfill_payment_totals", batch_size=1, stdout=mock.Mock())
+            call_command("backfill_payment_totals", batch_size=1, stdout=mock.Mock())
+
+        payment.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual(
+            (payment.total_cost, payment.total_profit, payment.item_count), (30000, 10000, 2))
+        self.assertEqual((empty.total_cost, empty.total_profit, empty.item_count), (0, 1000, 0))
+        invalidate.assert_called_once_with()
+
+
+def generate_order_codes(count):
+    try:
+        return [next_order_code() for _ in range(count)]
+    finally:
+        connections.close_all()
+
+
+class OrderCodeTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_codes_are_unique_across_processes_and_threads(self):
+        processes, per_process = 4, 25000
+        before_fork = [next_order_code() for _ in range(10)]
+        connections.close_all()
+
+        started = time.monotonic()
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            batches = pool.map(generate_order_codes, [per_process] * processes)
+        elapsed = time.monotonic() - started
+
+        threaded = []
+        threads = [
+            threading.Thread(target=lambda: threaded.extend(generate_order_codes(2000)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        codes = before_fork + threaded + [code for batch in batches for code in batch]
+        self.assertEqual(len(codes), len(set(codes)))
+        self.assertTrue(all(isinstance(code, int) and code > 0 for code in codes))
+        self.assertGreater(processes * per_process / elapsed, 10000)
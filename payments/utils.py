@@ -1,5 +1,6 @@
 import hmac
 import hashlib
+import json
 
 def verify_checksum(payload: dict, checksum_key: str, checksum_field: str = "signature") -> bool:
     if checksum_field not in payload:
@@ -39,4 +40,17 @@ def generate_signature(order_code, amount, description, return_url, cancel_url,
         raw_data.encode("utf-8"),
         hashlib.sha256
     ).hexdigest()
-    return signature
\ No newline at end of file
+    return signature
+
+def decode_items(raw_items):
+    # Older payments stored json.dumps(items) inside the JSONField.
+    if not raw_items:
+        return []
+    if isinstance(raw_items, str):
+        try:
+            raw_items = json.loads(raw_items)
+        except (json.JSONDecodeError, TypeError, ValueError):
+            return []
+    if not isinstance(raw_items, list):
+        return []
+    return [item for item in raw_items if isinstance(item, dict)]
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, Value, When
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'barcode'
+# Stored for bar codes with no active product so repeated scans of an
+# unknown code do not reach the database either.
+NOT_FOUND = 0
+
+
+def entry_key(bar_code):
+    return f'{KEY_PREFIX}:{bar_code}'
+
+
+def version_key(bar_code):
+    return f'{KEY_PREFIX}:v:{bar_code}'
+
+
+def current_versions(bar_codes, cached):
+    """
+    Version token of each bar code, creating missing ones. Shared entries
+    are stamped with the version read before the database was, so an
+    entry refilled from a row read before an invalidation never matches.
+    """
+    versions = {bar_code: cached.get(version_key(bar_code)) for bar_code in bar_codes}
+    missing = [bar_code for bar_code, version in versions.items() if version is None]
+    if missing:
+        for bar_code in missing:
+            cache.add(version_key(bar_code), uuid.uuid4().hex, None)
+        stored = cache.get_many([version_key(bar_code) for bar_code in missing])
+        versions.update({bar_code: stored.get(version_key(bar_code)) for bar_code in missing})
+    return versions
+
+
+class LocalLRU:
+    """
+    Per-process LRU in front of the shared cache. Entries expire after
+    BARCODE_CACHE_LOCAL_TTL seconds because invalidations only reach the
+    process that made the change; other workers converge within that time.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local = LocalLRU(settings.BARCODE_CACHE_SIZE, settings.BARCODE_CACHE_LOCAL_TTL)
+
+
+def load_products(bar_codes):
+    rows = Product.objects.filter(bar_code__in=bar_codes, is_active=True).annotate(
+        is_reorder=Case(
+            When(stock_quantity__lte=F("reorder_point"), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    ).values("bar_code", "sku", "name", "price", "unit", "stock_quantity", "is_reorder")
+    return {row["bar_code"]: row for row in rows}
+
+
+def lookup(bar_codes):
+    """
+    Map each bar code to its POS entry, or None when no active product has
+    it. Reads the local LRU, then the shared cache, then the database.
+    """
+    found = {}
+    missing = []
+    for bar_code in dict.fromkeys(bar_codes):
+        value = local.get(bar_code)
+        if value is None:
+            missing.append(bar_code)
+        else:
+            found[bar_code] = value
+
+    versions = None
+    if missing:
+        try:
+            shared = cache.get_many(
+                [entry_key(bar_code) for bar_code in missing]
+                + [version_key(bar_code) for bar_code in missing])
+            versions = current_versions(missing, shared)
+        except Exception as ex:
+            logger.warning("Barcode cache unavailable: %s", ex)
+            shared = {}
+        for bar_code in missing:
+            entry = shared.get(entry_key(bar_code))
+            # (version, value); an entry from an older version is stale.
+            if isinstance(entry, tuple) and versions and entry[0] == versions[bar_code]:
+                found[bar_code] = entry[1]
+                local.set(bar_code, entry[1])
+        missing = [bar_code for bar_code in missing if bar_code not in found]
+
+    if missing:
+        products = load_products(missing)
+        loaded = {bar_code: products.get(bar_code, NOT_FOUND) for bar_code in missing}
+        if versions:
+            try:
+                cache.set_many(
+                    {
+                        entry_key(bar_code): (versions[bar_code], value)
+                        for bar_code, value in loaded.items() if versions[bar_code]
+                    },
+                    settings.BARCODE_CACHE_TTL
+                )
+            except Exception as ex:
+                logger.warning("Barcode cache unavailable: %s", ex)
+        for bar_code, value in loaded.items():
+            local.set(bar_code, value)
+        found.update(loaded)
+
+    return {bar_code: found[bar_code] or None for bar_code in dict.fromkeys(bar_codes)}
+
+
+def drop(bar_codes):
+    local.delete(bar_codes)
+    try:
+        # A new version orphans the current entries and any refill of a row
+        # read before this change that is still on its way to the cache.
+        cache.set_many({version_key(bar_code): uuid.uuid4().hex for bar_code in bar_codes}, None)
+        cache.delete_many([entry_key(bar_code) for bar_code in bar_codes])
+    except Exception as ex:
+        logger.warning("Barcode cache invalidation failed: %s", ex)
+
+
+def invalidate(bar_codes):
+    """Forget cached entries for `bar_codes` once the current transaction commits."""
+    bar_codes = [bar_code for bar_code in bar_codes if bar_code]
+    if bar_codes:
+        transaction.on_commit(partial(drop, bar_codes))
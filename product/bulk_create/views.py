@@ -6,6 +6,8 @@ from .serializer import BulkCreateProductsSerializer
 from ..models import Product, Category
 from django.db import transaction
 from django.db.models import Q
+from .. import barcode_cache
+from ..ledger import Kind, record_movements
 
 
 class BulkCreateProducts(APIView):
@@ -94,6 +96,11 @@ class BulkCreateProducts(APIView):
             if products_to_create:
                 with transaction.atomic():
                     Product.objects.bulk_create(products_to_create)
+                    record_movements(
+                        (product.id, Kind.RESTOCK, product.stock_quantity, product.stock_quantity, 'bulk-create')
+                        for product in products_to_create
+                    )
+                    barcode_cache.invalidate([product.bar_code for product in products_to_create])
                     success_count = len(products_to_create)
 
             return Response({
@@ -0,0 +1,55 @@
+from decimal import Decimal
+from rest_framework import serializers
+
+MAX_ITEMS = 5000
+
+
+class BulkUpdateItemSerializer(serializers.Serializer):
+    barCode = serializers.CharField(max_length=64, source='bar_code')
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=Decimal('0.01'))
+    costPrice = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=Decimal('0.01'), source='cost_price')
+    quantity = serializers.IntegerField(required=False, min_value=0, source='stock_quantity')
+    reorderPoint = serializers.IntegerField(required=False, min_value=0, source='reorder_point')
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError(
+                "Cần ít nhất một trong price, costPrice, quantity, reorderPoint")
+        return attrs
+
+
+class CategoryAdjustmentSerializer(serializers.Serializer):
+    category = serializers.CharField(max_length=255)
+    pricePercent = serializers.DecimalField(
+        max_digits=6, decimal_places=2, required=False, min_value=Decimal('-99.99'), source='price_percent')
+    costPricePercent = serializers.DecimalField(
+        max_digits=6, decimal_places=2, required=False, min_value=Decimal('-99.99'), source='cost_price_percent')
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError(
+                "Cần ít nhất một trong pricePercent, costPricePercent")
+        return attrs
+
+
+class BulkUpdateProductsSerializer(serializers.Serializer):
+    items = BulkUpdateItemSerializer(many=True, required=False, default=list)
+    adjustments = CategoryAdjustmentSerializer(many=True, required=False, default=list)
+
+    def validate_items(self, value):
+        if len(value) > MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"Không thể cập nhật quá {MAX_ITEMS} sản phẩm cùng lúc")
+        bar_codes = [item['bar_code'] for item in value]
+        if len(bar_codes) != len(set(bar_codes)):
+            raise serializers.ValidationError(
+                "Có barcode bị trùng lặp trong danh sách")
+        return value
+
+    def validate(self, attrs):
+        if not attrs['items'] and not attrs['adjustments']:
+            raise serializers.ValidationError(
+                "Danh sách cập nhật không được để trống")
+        return attrs
@@ -0,0 +1,54 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from django.db import transaction
+from .serializer import BulkUpdateProductsSerializer
+from ..services import bulk_update_products
+
+
+class BulkUpdateProducts(APIView):
+    """
+    Update price, cost price, stock and reorder point of many products by
+    bar code, and/or scale prices of whole categories by a percentage.
+    The response only lists fields that actually changed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkUpdateProductsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'status': '2',
+                'response': {
+                    'error_code': '001',
+                    'error_message_us': 'Validation error',
+                    'error_message_vn': 'Dữ liệu không hợp lệ',
+                    'errors': serializer.errors
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                changes, not_found = bulk_update_products(
+                    serializer.validated_data['items'],
+                    serializer.validated_data['adjustments'],
+                )
+        except Exception as ex:
+            return Response({
+                'status': '2',
+                'response': {
+                    'error_code': '9999',
+                    'error_message_us': 'System error',
+                    'error_message_vn': 'Lỗi hệ thống'
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'status': '1',
+            'response': {
+                'updated': len(changes),
+                'changes': changes,
+                'not_found': not_found
+            }
+        })
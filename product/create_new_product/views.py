@@ -5,6 +5,8 @@ from rest_framework import status
 from .serializer import ProductSerializer
 from django.db import transaction
 from ..models import Category
+from .. import barcode_cache
+from ..ledger import Kind, record_movements
 
 
 class CreateProduct(APIView):
@@ -35,6 +37,10 @@ class CreateProduct(APIView):
 
             with transaction.atomic():
                 product = serializer.save()
+                record_movements([(
+                    product.id, Kind.RESTOCK, product.stock_quantity, product.stock_quantity, 'create'
+                )])
+                barcode_cache.invalidate([product.bar_code])
 
             return Response({
                 'status': '1',
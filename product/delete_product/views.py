@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from ..models import Product
 from django.db import transaction
+from .. import barcode_cache
 
 
 class DeleteProductView(APIView):
@@ -21,6 +22,7 @@ class DeleteProductView(APIView):
                 if product:
                     product.is_active = False;
                     product.save()
+                    barcode_cache.invalidate([product.bar_code])
                     return Response({
                         'status': '1',
                         'response': 'Delete successfully'
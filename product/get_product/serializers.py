@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+PRODUCT_FIELDS = (
+    "name", "sku", "bar_code", "name_category", "unit",
+    "price", "is_reorder", "stock_quantity", "cost_price",
+)
+SORT_KEYS = ("stock_quantity", "price", "name", "updated_at")
+
+
+class ProductListQuerySerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=500)
+    sort = serializers.ChoiceField(
+        required=False, default="stock_quantity",
+        choices=SORT_KEYS + tuple(f"-{key}" for key in SORT_KEYS))
+    category = serializers.IntegerField(required=False)
+    low_stock = serializers.BooleanField(required=False, default=False)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    q = serializers.CharField(required=False, trim_whitespace=True)
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        fields = [field.strip() for field in value.split(",") if field.strip()]
+        unknown = set(fields) - set(PRODUCT_FIELDS)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown fields: {', '.join(sorted(unknown))}")
+        return fields
@@ -3,33 +3,64 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from ..models import Product
 from django.db.models import Case, When, Value, BooleanField
-from django.db.models import F
+from django.db.models import F, Q
+from .pagination import InvalidCursor, paginate
+from .serializers import PRODUCT_FIELDS, ProductListQuerySerializer
 
 class GetProduct(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        params = ProductListQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({
+                "status": "2",
+                "error_message": params.errors
+            }, status=400)
+        params = params.validated_data
+
         try:
-            list_product = Product.objects.filter(is_active=True).annotate(
+            list_product = Product.objects.filter(is_active=True)
+            if "category" in params:
+                list_product = list_product.filter(category_id=params["category"])
+            if params["low_stock"]:
+                list_product = list_product.filter(stock_quantity__lte=F("reorder_point"))
+            if "min_price" in params:
+                list_product = list_product.filter(price__gte=params["min_price"])
+            if "max_price" in params:
+                list_product = list_product.filter(price__lte=params["max_price"])
+            if params.get("q"):
+                q = params["q"]
+                list_product = list_product.filter(
+                    Q(name__icontains=q) | Q(sku__icontains=q) | Q(bar_code__icontains=q)
+                )
+
+            fields = params.get("fields") or list(PRODUCT_FIELDS)
+            sort = params["sort"]
+            list_product = list_product.annotate(
                 is_reorder = Case(
                     When(stock_quantity__lte=F("reorder_point"),then=Value(True)),
                     default=Value(False),
                     output_field=BooleanField()
                 ),
                 name_category=F("category_id__name")
-            ).values(
-                "name", "sku", "bar_code", "name_category", "unit",
-                "price", "is_reorder", "stock_quantity", "cost_price"
-            )
-            list_product = list_product.order_by('stock_quantity')[:100]
+            ).values(*fields, "id", sort.lstrip("-"))
 
+            rows, next_cursor = paginate(list_product, sort, params.get("cursor"), params["limit"])
             return Response({
                 "status": "1",
-                "response":list_product
+                "response": [{field: row[field] for field in fields} for row in rows],
+                "next_cursor": next_cursor
             })
 
+        except InvalidCursor as ex:
+            return Response({
+                "status": "2",
+                "error_message": str(ex)
+            }, status=400)
+
         except Exception as ex:
             return Response({
                 "error_code": "9999",
                 "error_message": "System error",
-            })
\ No newline at end of file
+            })
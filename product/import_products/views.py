@@ -0,0 +1,98 @@
+import os
+from django.http import FileResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework import status
+from ..models import ProductImport
+from ..importer import ImportFileError, save_upload
+
+
+def import_state(job):
+    return {
+        'id': job.id,
+        'file_name': job.file_name,
+        'status': job.status,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'progress': round(job.processed_rows * 100 / job.total_rows, 1) if job.total_rows else 0,
+        'created': job.created_count,
+        'updated': job.updated_count,
+        'failed': job.failed_count,
+        'error_message': job.last_error,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+
+class ImportProducts(APIView):
+    """
+    Queue a CSV/XLSX catalog upload. Rows are upserted by bar code by the
+    process_product_imports worker; poll the import for progress.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({
+                'status': '2',
+                'response': {
+                    'error_code': '001',
+                    'error_message_us': 'File is required',
+                    'error_message_vn': 'Vui lòng chọn file'
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            job = save_upload(upload)
+        except ImportFileError as ex:
+            return Response({
+                'status': '2',
+                'response': {
+                    'error_code': '001',
+                    'error_message_us': 'Unsupported file type',
+                    'error_message_vn': str(ex)
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': '1',
+            'response': import_state(job)
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ProductImportStatus(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = ProductImport.objects.filter(pk=pk).first()
+        if not job:
+            return Response({
+                'status': '2',
+                'error_code': '2',
+                'error_message': 'Import not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'status': '1',
+            'response': import_state(job)
+        })
+
+
+class ProductImportErrors(APIView):
+    """Download the rows of an import that were rejected, with the reason."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = ProductImport.objects.filter(pk=pk).first()
+        if not job or not job.error_file or not os.path.exists(job.error_file):
+            return Response({
+                'status': '2',
+                'error_code': '2',
+                'error_message': 'Error file not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            open(job.error_file, 'rb'), as_attachment=True,
+            filename=f"import-{job.id}-errors.csv", content_type='text/csv')
@@ -0,0 +1,352 @@
+import csv
+import logging
+import os
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Category, Product, ProductImport
+from . import barcode_cache
+from .ledger import Kind, record_movements
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+# Accepted header spellings, keyed by the product field they fill. The
+# camelCase names are the ones the JSON bulk-create API uses.
+COLUMNS = {
+    'name': ('name', 'productname', 'tensanpham'),
+    'sku': ('sku',),
+    'bar_code': ('barcode', 'bar_code'),
+    'category': ('category', 'danhmuc'),
+    'cost_price': ('costprice', 'cost_price', 'gianhap'),
+    'price': ('price', 'giaban'),
+    'stock_quantity': ('quantity', 'stock_quantity', 'soluong'),
+    'unit': ('unit', 'donvi'),
+    'reorder_point': ('reorderpoint', 'reorder_point'),
+}
+REQUIRED = ('name', 'sku', 'bar_code', 'category', 'cost_price', 'price', 'stock_quantity', 'unit')
+UNIQUE_FIELDS = ('bar_code', 'sku', 'name')
+CLASH_LABELS = {'sku': 'SKU', 'name': 'Tên sản phẩm'}
+UPDATE_FIELDS = [
+    'name', 'sku', 'category_id', 'unit', 'price', 'cost_price',
+    'stock_quantity', 'reorder_point', 'is_active', 'updated_at',
+]
+
+
+# Range of the IntegerField columns (stock_quantity, reorder_point).
+INT_MAX = 2147483647
+
+
+class ImportFileError(Exception):
+    pass
+
+
+def import_path(name):
+    os.makedirs(settings.PRODUCT_IMPORT_DIR, exist_ok=True)
+    return os.path.join(settings.PRODUCT_IMPORT_DIR, name)
+
+
+def save_upload(upload):
+    """Store an uploaded catalog and queue it for process_product_imports."""
+    extension = os.path.splitext(upload.name)[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise ImportFileError("Chỉ hỗ trợ file .csv hoặc .xlsx")
+
+    job = ProductImport.objects.create(file_name=upload.name[:255], file_path='')
+    path = import_path(f"{job.id}{extension}")
+    with open(path, 'wb') as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+    job.file_path = path
+    job.save(update_fields=['file_path', 'updated_at'])
+    return job
+
+
+def header_map(header):
+    """Map column positions to product fields; unknown columns are ignored."""
+    aliases = {alias: field for field, names in COLUMNS.items() for alias in names}
+    mapping = {}
+    for index, title in enumerate(header):
+        key = str(title or '').strip().lower().replace(' ', '')
+        if key in aliases:
+            mapping[index] = aliases[key]
+    missing = [field for field in REQUIRED if field not in mapping.values()]
+    if missing:
+        raise ImportFileError(f"Thiếu cột: {', '.join(missing)}")
+    return mapping
+
+
+def read_rows(path):
+    """Yield (row number, raw values) without loading the file into memory."""
+    if path.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for number, values in enumerate(workbook.active.iter_rows(values_only=True), 1):
+                yield number, values
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            for number, values in enumerate(csv.reader(file), 1):
+                yield number, values
+
+
+def count_rows(path):
+    if path.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return max(0, (workbook.active.max_row or 1) - 1)
+        finally:
+            workbook.close()
+    with open(path, 'rb') as file:
+        return max(0, sum(1 for _ in file) - 1)
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(value):
+    try:
+        number = Decimal(_text(value))
+    except InvalidOperation:
+        return None
+    # NaN cannot be compared and Infinity cannot be stored.
+    if not number.is_finite():
+        return None
+    return number
+
+
+def _int(value):
+    number = _decimal(value)
+    if number is None or number != number.to_integral_value() or abs(number) > INT_MAX:
+        return None
+    return int(number)
+
+
+def cell(values, mapping, field):
+    for index, name in mapping.items():
+        if name == field and index < len(values):
+            return _text(values[index])
+    return ''
+
+
+def validate_row(values, mapping):
+    """
+    Return (product data, None) or (None, error message). Same rules as
+    BulkProductSerializer, without building a serializer per row.
+    """
+    raw = {field: values[index] if index < len(values) else None for index, field in mapping.items()}
+    data = {field: _text(raw.get(field)) for field in ('name', 'sku', 'bar_code', 'category', 'unit')}
+
+    if not data['name']:
+        return None, "Tên sản phẩm không được để trống"
+    if not data['sku']:
+        return None, "SKU không được để trống"
+    if not data['bar_code']:
+        return None, "Barcode không được để trống"
+    if not data['category']:
+        return None, "Danh mục không được để trống"
+    if not data['unit']:
+        return None, "Đơn vị không được để trống"
+    if len(data['name']) > 255 or len(data['category']) > 255 or len(data['unit']) > 50 \
+            or len(data['sku']) > 64 or len(data['bar_code']) > 64:
+        return None, "Giá trị vượt quá độ dài cho phép"
+
+    data['cost_price'] = _decimal(raw.get('cost_price'))
+    if data['cost_price'] is None or data['cost_price'] <= 0:
+        return None, "Giá nhập phải lớn hơn 0"
+    data['price'] = _decimal(raw.get('price'))
+    if data['price'] is None or data['price'] <= 0:
+        return None, "Giá bán phải lớn hơn 0"
+    for field in ('cost_price', 'price'):
+        if data[field] >= Decimal('1e8'):
+            return None, "Giá vượt quá giới hạn"
+        data[field] = data[field].quantize(Decimal('0.01'))
+
+    data['stock_quantity'] = _int(raw.get('stock_quantity'))
+    if data['stock_quantity'] is None:
+        return None, "Số lượng không hợp lệ"
+    if data['stock_quantity'] < 0:
+        return None, "Số lượng không được âm"
+    data['reorder_point'] = 0
+    if _text(raw.get('reorder_point')):
+        data['reorder_point'] = _int(raw.get('reorder_point'))
+        if data['reorder_point'] is None or data['reorder_point'] < 0:
+            return None, "Điểm đặt hàng lại không hợp lệ"
+    return data, None
+
+
+def resolve_categories(names, categories):
+    """Fill `categories` (name -> id) for `names` with one upsert."""
+    missing = sorted(set(names) - set(categories))
+    if not missing:
+        return
+    created = Category.objects.bulk_create(
+        [Category(name=name) for name in missing],
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['updated_at'],
+    )
+    categories.update({category.name: category.pk for category in created})
+
+
+def load_chunk(rows, categories, reference=''):
+    """
+    Upsert one chunk of validated rows keyed by bar code and record the
+    stock changes. Returns (created, updated, errors) where errors are
+    (row number, bar code, message).
+    """
+    errors = []
+    bar_codes = [data['bar_code'] for _, data in rows]
+    existing = {}
+    taken = {}
+    # Locked so the stock adjustments recorded below match what is replaced.
+    for product in Product.objects.select_for_update().filter(
+        Q(bar_code__in=bar_codes)
+        | Q(sku__in=[data['sku'] for _, data in rows])
+        | Q(name__in=[data['name'] for _, data in rows])
+    ).order_by('id').values('bar_code', 'sku', 'name', 'stock_quantity'):
+        existing[product['bar_code']] = product
+        taken[('sku', product['sku'])] = product['bar_code']
+        taken[('name', product['name'])] = product['bar_code']
+
+    products = []
+    for number, data in rows:
+        # name and sku are unique too; a clash with another product would
+        # abort the whole statement, so it is reported per row instead.
+        clash = next((
+            field for field in ('sku', 'name')
+            if taken.get((field, data[field]), data['bar_code']) != data['bar_code']
+        ), None)
+        if clash:
+            errors.append((number, data['bar_code'], f"{CLASH_LABELS[clash]} đã thuộc về sản phẩm khác"))
+            continue
+        products.append(Product(
+            name=data['name'], sku=data['sku'], bar_code=data['bar_code'],
+            category_id_id=categories[data['category']], unit=data['unit'],
+            price=data['price'], cost_price=data['cost_price'],
+            stock_quantity=data['stock_quantity'], reorder_point=data['reorder_point'],
+            is_active=True,
+        ))
+
+    if products:
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['bar_code'],
+            update_fields=UPDATE_FIELDS,
+        )
+        record_movements(
+            (product.pk, Kind.ADJUSTMENT,
+             product.stock_quantity - existing[product.bar_code]['stock_quantity'],
+             product.stock_quantity, reference)
+            if product.bar_code in existing else
+            (product.pk, Kind.RESTOCK, product.stock_quantity, product.stock_quantity, reference)
+            for product in products
+        )
+        barcode_cache.invalidate([product.bar_code for product in products])
+    updated = sum(1 for product in products if product.bar_code in existing)
+    return len(products) - updated, updated, errors
+
+
+def run_import(job, chunk_size=None):
+    chunk_size = chunk_size or settings.PRODUCT_IMPORT_CHUNK_SIZE
+    job.total_rows = count_rows(job.file_path)
+    job.error_file = import_path(f"{job.id}-errors.csv")
+    job.save(update_fields=['total_rows', 'error_file', 'updated_at'])
+
+    rows = read_rows(job.file_path)
+    try:
+        _, header = next(rows)
+    except StopIteration:
+        raise ImportFileError("File rỗng")
+    mapping = header_map(header)
+
+    categories = {}
+    seen = set()
+    with open(job.error_file, 'w', newline='', encoding='utf-8') as error_file:
+        errors = csv.writer(error_file)
+        errors.writerow(['row', 'barCode', 'error'])
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            valid = []
+            failed = []
+            for number, values in chunk:
+                if not any(_text(value) for value in values):
+                    continue
+                data, error = validate_row(values, mapping)
+                if data and any((field, data[field]) in seen for field in UNIQUE_FIELDS):
+                    data, error = None, "Barcode, SKU hoặc tên bị trùng lặp trong file"
+                if error:
+                    failed.append((number, cell(values, mapping, 'bar_code'), error))
+                    continue
+                seen.update((field, data[field]) for field in UNIQUE_FIELDS)
+                valid.append((number, data))
+
+            created = updated = 0
+            if valid:
+                try:
+                    # Category ids are only remembered once the chunk that
+                    # created them has committed.
+                    resolved = dict(categories)
+                    with transaction.atomic():
+                        resolve_categories([data['category'] for _, data in valid], resolved)
+                        created, updated, clashes = load_chunk(valid, resolved, f"import-{job.id}")
+                    categories.update(resolved)
+                except IntegrityError as ex:
+                    # A concurrent write took a name or sku this chunk uses.
+                    logger.warning("Product import %s chunk failed: %s", job.id, ex)
+                    clashes = [(number, data['bar_code'], "Xung đột dữ liệu, vui lòng thử lại")
+                               for number, data in valid]
+                failed.extend(clashes)
+
+            errors.writerows(sorted(failed))
+            job.processed_rows += len(chunk)
+            job.created_count += created
+            job.updated_count += updated
+            job.failed_count += len(failed)
+            job.save(update_fields=[
+                'processed_rows', 'created_count', 'updated_count', 'failed_count', 'updated_at'])
+
+
+def claim_next_import():
+    with transaction.atomic():
+        job = (
+            ProductImport.objects.select_for_update(skip_locked=True)
+            .filter(status=ProductImport.Status.PENDING)
+            .order_by('id')
+            .first()
+        )
+        if job:
+            job.status = ProductImport.Status.PROCESSING
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'started_at', 'updated_at'])
+        return job
+
+
+def process_next_import():
+    """Run the oldest pending import to completion. Returns it, or None when idle."""
+    job = claim_next_import()
+    if not job:
+        return None
+    try:
+        run_import(job)
+    except Exception as ex:
+        logger.exception("Product import %s failed", job.id)
+        job.status = ProductImport.Status.FAILED
+        job.last_error = str(ex)
+    else:
+        job.status = ProductImport.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+    return job
@@ -0,0 +1,94 @@
+from django.db import connection
+from .models import StockMovement
+
+Kind = StockMovement.Kind
+
+# Balance of each product in `products` at `at`: its latest snapshot taken
+# at or before `at` plus the movements after that snapshot. Both parts are
+# index range scans on (product, time).
+AS_OF_SQL = """
+    SELECT p.id, p.bar_code,
+           COALESCE(s.quantity, 0) + COALESCE((
+               SELECT SUM(m.quantity)
+               FROM stock_movement m
+               WHERE m.product_id = p.id
+                 AND m.created_at > COALESCE(s.taken_at, '-infinity')
+                 AND m.created_at <= %(at)s
+           ), 0) AS quantity
+    FROM product p
+    LEFT JOIN LATERAL (
+        SELECT taken_at, quantity
+        FROM stock_snapshot
+        WHERE product_id = p.id AND taken_at <= %(at)s
+        ORDER BY taken_at DESC
+        LIMIT 1
+    ) s ON TRUE
+    WHERE {products}
+"""
+
+
+def record_movements(movements):
+    """
+    Append (product_id, kind, quantity, balance_after, reference) rows in
+    one INSERT. Zero-quantity changes are skipped. Call in the transaction
+    that changed stock_quantity, after the product rows were locked.
+    """
+    rows = [
+        StockMovement(
+            product_id=product_id, kind=kind, quantity=quantity,
+            balance_after=balance_after, reference=str(reference or '')[:64],
+        )
+        for product_id, kind, quantity, balance_after, reference in movements
+        if quantity
+    ]
+    if rows:
+        StockMovement.objects.bulk_create(rows)
+    return rows
+
+
+def stock_as_of(at, product_ids=None):
+    """Map product id -> (bar code, stock at `at`) for the given products (all when None)."""
+    if product_ids is None:
+        products, params = "TRUE", {'at': at}
+    else:
+        products, params = "p.id = ANY(%(ids)s)", {'at': at, 'ids': list(product_ids)}
+    with connection.cursor() as cursor:
+        cursor.execute(AS_OF_SQL.format(products=products), params)
+        return {product_id: (bar_code, quantity) for product_id, bar_code, quantity in cursor.fetchall()}
+
+
+def take_snapshots(at):
+    """Snapshot every product's stock at `at`. Returns the number of snapshots written."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO stock_snapshot (product_id, taken_at, quantity, created_at, updated_at, is_active)
+            SELECT balance.id, %(at)s, balance.quantity, NOW(), NOW(), TRUE
+            FROM ({AS_OF_SQL.format(products="TRUE")}) balance
+            ON CONFLICT (product_id, taken_at) DO NOTHING
+            """,
+            {'at': at}
+        )
+        return cursor.rowcount
+
+
+def prune_movements(before):
+    """
+    Delete movements already folded into a snapshot taken at or before
+    `before`; as-of queries from that snapshot on are unaffected.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE FROM stock_movement m
+            USING (
+                SELECT product_id, MAX(taken_at) AS taken_at
+                FROM stock_snapshot
+                WHERE taken_at <= %s
+                GROUP BY product_id
+            ) s
+            WHERE m.product_id = s.product_id AND m.created_at <= s.taken_at
+            """,
+            [before]
+        )
+        return cursor.rowcount
@@ -0,0 +1,7 @@
+from rest_framework import serializers
+
+
+class LowStockQuerySerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=500)
+    category = serializers.IntegerField(required=False)
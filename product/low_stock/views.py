@@ -0,0 +1,49 @@
+from django.db.models import F
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from ..models import Product
+from ..get_product.pagination import InvalidCursor, paginate
+from .serializer import LowStockQuerySerializer
+
+LOW_STOCK_FIELDS = (
+    "bar_code", "sku", "name", "unit",
+    "stock_quantity", "reserved_quantity", "reorder_point",
+)
+
+
+class LowStockProducts(APIView):
+    """
+    Active products at or below their reorder point, emptiest first. Pages
+    are keyset cursors over the partial product_low_stock_idx index.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = LowStockQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({
+                'status': '2',
+                'error_message': params.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        params = params.validated_data
+
+        products = Product.objects.filter(is_active=True, stock_quantity__lte=F('reorder_point'))
+        if 'category' in params:
+            products = products.filter(category_id=params['category'])
+        try:
+            rows, next_cursor = paginate(
+                products.values('id', *LOW_STOCK_FIELDS),
+                'stock_quantity', params.get('cursor'), params['limit'])
+        except InvalidCursor as ex:
+            return Response({
+                'status': '2',
+                'error_message': str(ex)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': '1',
+            'response': [{field: row[field] for field in LOW_STOCK_FIELDS} for row in rows],
+            'next_cursor': next_cursor
+        })
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from product.importer import process_next_import
+
+
+class Command(BaseCommand):
+    help = "Load queued CSV/XLSX product catalog uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep when no import is queued")
+        parser.add_argument('--once', action='store_true',
+                            help="Run the queued imports once and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = process_next_import()
+            if job:
+                self.stdout.write(
+                    f"Import {job.id} {job.status}: {job.created_count} created, "
+                    f"{job.updated_count} updated, {job.failed_count} failed")
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
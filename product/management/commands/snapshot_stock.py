@@ -0,0 +1,37 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from product.ledger import prune_movements, take_snapshots
+from report.timeseries import day_start, store_timezone, store_today
+
+
+class Command(BaseCommand):
+    help = "Snapshot every product's stock so as-of queries only replay recent movements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at',
+                            help="Snapshot time (ISO datetime, store-local when naive); defaults to the start of today")
+        parser.add_argument('--prune-days', type=int,
+                            help="Also delete movements already covered by a snapshot older than this many days")
+
+    def handle(self, *args, **options):
+        if options['at']:
+            at = parse_datetime(options['at'])
+            if at is None:
+                raise CommandError("--at must be an ISO datetime")
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at, store_timezone())
+        else:
+            at = day_start(store_today())
+        # Movements are stamped when their transaction runs; leave room for
+        # ones still in flight so the snapshot does not miss them.
+        if at > timezone.now() - timedelta(minutes=5):
+            raise CommandError("--at must be at least 5 minutes in the past")
+
+        written = take_snapshots(at)
+        self.stdout.write(f"Wrote {written} snapshots at {at.isoformat()}")
+
+        if options['prune_days'] is not None:
+            pruned = prune_movements(timezone.now() - timedelta(days=options['prune_days']))
+            self.stdout.write(f"Pruned {pruned} movements")
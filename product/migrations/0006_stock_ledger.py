@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 14:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('kind', models.CharField(choices=[('sale', 'Bán hàng'), ('credit_sale', 'Bán ghi nợ'), ('restock', 'Nhập hàng'), ('adjustment', 'Điều chỉnh'), ('refund', 'Hoàn trả')], max_length=16)),
+                ('quantity', models.IntegerField()),
+                ('balance_after', models.IntegerField()),
+                ('reference', models.CharField(blank=True, default='', max_length=64)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='product.product')),
+            ],
+            options={
+                'db_table': 'stock_movement',
+                'indexes': [models.Index(fields=['product', 'created_at', 'id'], include=('quantity',), name='stock_movement_product_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.IntegerField()),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='stock_snapshots', to='product.product')),
+            ],
+            options={
+                'db_table': 'stock_snapshot',
+                'constraints': [models.UniqueConstraint(fields=('product', 'taken_at'), name='stock_snapshot_product_taken_uniq')],
+            },
+        ),
+        # Opening balances: history starts from the stock each product has
+        # when the ledger is introduced.
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO stock_snapshot (product_id, taken_at, quantity, created_at, updated_at, is_active)
+                SELECT id, NOW(), stock_quantity, NOW(), NOW(), TRUE FROM product
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_product_reserved_quantity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock_quantity__lte', models.F('reorder_point'))), fields=['stock_quantity', 'id'], name='product_low_stock_idx'),
+        ),
+    ]
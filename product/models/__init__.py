@@ -1,3 +1,6 @@
 from .base import BaseModel
 from .category import Category
-from .product import Product
\ No newline at end of file
+from .product import Product
+from .product_import import ProductImport
+from .stock_movement import StockMovement
+from .stock_snapshot import StockSnapshot
\ No newline at end of file
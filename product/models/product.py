@@ -16,9 +16,33 @@ class Product(BaseModel):
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, null=False)
     stock_quantity = models.IntegerField(default=0)
     reorder_point = models.IntegerField(default=0)
+    # Units held by pending online payments; they are still on the shelf
+    # (stock_quantity) but can no longer be sold online.
+    reserved_quantity = models.IntegerField(default=0, db_default=0)
 
     class Meta:
         db_table = 'product'
+        # Keyset pagination of the product list seeks on (sort column, id)
+        # over active products, one index per sort key.
+        indexes = [
+            models.Index(
+                fields=[field, 'id'],
+                name=f'product_{alias}_id_idx',
+                condition=models.Q(is_active=True),
+            )
+            for field, alias in (
+                ('stock_quantity', 'stock'), ('price', 'price'),
+                ('name', 'name'), ('updated_at', 'updated'),
+            )
+        ] + [
+            # Only products at or below their reorder point, usually a small
+            # slice of the catalog; serves the low-stock list and filter.
+            models.Index(
+                fields=['stock_quantity', 'id'],
+                name='product_low_stock_idx',
+                condition=models.Q(is_active=True, stock_quantity__lte=models.F('reorder_point')),
+            ),
+        ]
 
     def __str__(self):
         pass
\ No newline at end of file
@@ -0,0 +1,34 @@
+from django.db import models
+from .base import BaseModel
+from .product import Product
+
+class StockMovement(BaseModel):
+    """
+    One change to a product's stock. Rows are only ever inserted; the
+    product's stock_quantity is the running balance they add up to.
+    """
+
+    class Kind(models.TextChoices):
+        SALE = 'sale', 'Bán hàng'
+        CREDIT_SALE = 'credit_sale', 'Bán ghi nợ'
+        RESTOCK = 'restock', 'Nhập hàng'
+        ADJUSTMENT = 'adjustment', 'Điều chỉnh'
+        REFUND = 'refund', 'Hoàn trả'
+
+    product = models.ForeignKey(
+        Product, on_delete=models.PROTECT, related_name='stock_movements', db_index=False)
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    quantity = models.IntegerField()
+    balance_after = models.IntegerField()
+    reference = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        db_table = 'stock_movement'
+        indexes = [
+            # History and as-of queries read one product's movements by time.
+            models.Index(
+                fields=['product', 'created_at', 'id'],
+                include=['quantity'],
+                name='stock_movement_product_idx'
+            ),
+        ]
@@ -0,0 +1,20 @@
+from django.db import models
+from .base import BaseModel
+from .product import Product
+
+class StockSnapshot(BaseModel):
+    """Stock of a product at `taken_at`; as-of queries start from the latest one."""
+
+    product = models.ForeignKey(
+        Product, on_delete=models.PROTECT, related_name='stock_snapshots', db_index=False)
+    taken_at = models.DateTimeField()
+    quantity = models.IntegerField()
+
+    class Meta:
+        db_table = 'stock_snapshot'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'taken_at'],
+                name='stock_snapshot_product_taken_uniq'
+            ),
+        ]
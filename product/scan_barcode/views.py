@@ -0,0 +1,52 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .. import barcode_cache
+
+MAX_BATCH = 200
+
+
+class ScanBarcode(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, bar_code):
+        product = barcode_cache.lookup([bar_code])[bar_code]
+        if not product:
+            return Response({
+                'status': '2',
+                'error_code': '2',
+                'error_message': 'Product not found'
+            })
+        return Response({
+            'status': '1',
+            'response': product
+        })
+
+
+class ScanBarcodeBatch(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        bar_codes = request.data.get('bar_codes')
+        if not isinstance(bar_codes, list) or not bar_codes \
+                or not all(isinstance(bar_code, str) for bar_code in bar_codes):
+            return Response({
+                'status': '2',
+                'error_code': '1',
+                'error_message': 'bar_codes must be a non-empty list of bar codes'
+            }, status=400)
+        if len(bar_codes) > MAX_BATCH:
+            return Response({
+                'status': '2',
+                'error_code': '1',
+                'error_message': f'At most {MAX_BATCH} bar codes per request'
+            }, status=400)
+
+        products = barcode_cache.lookup(bar_codes)
+        return Response({
+            'status': '1',
+            'response': {
+                'products': {bar_code: product for bar_code, product in products.items() if product},
+                'not_found': [bar_code for bar_code, product in products.items() if not product]
+            }
+        })
@@ -0,0 +1,194 @@
+from django.db import connection
+from .models import Product
+from . import barcode_cache
+from .ledger import Kind, record_movements
+
+
+def basket_quantities(items):
+    quantities = {}
+    for item in items or []:
+        bar_code = item.get('bar_code') or item.get('sku')
+        try:
+            quantity = int(item.get('quantity') or 0)
+        except (TypeError, ValueError):
+            quantity = 0
+        if bar_code and quantity > 0:
+            quantities[bar_code] = quantities.get(bar_code, 0) + quantity
+    return quantities
+
+
+def deduct_stock(items, kind=Kind.SALE, reference=''):
+    """
+    Decrement stock for a whole basket, record the movements and return the
+    bar codes that reached their reorder point. Must run inside
+    transaction.atomic().
+    """
+    quantities = basket_quantities(items)
+    if not quantities:
+        return []
+
+    # Lock in a stable order so two terminals selling overlapping baskets
+    # queue behind each other instead of deadlocking.
+    locked = dict(
+        Product.objects.select_for_update()
+        .filter(bar_code__in=list(quantities))
+        .order_by('id')
+        .values_list('id', 'stock_quantity')
+    )
+    if not locked:
+        return []
+
+    rows = ', '.join(['(%s, %s)'] * len(quantities))
+    params = [value for pair in quantities.items() for value in pair]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE product AS p
+            SET stock_quantity = GREATEST(0, p.stock_quantity - basket.quantity),
+                updated_at = NOW()
+            FROM (VALUES {rows}) AS basket (bar_code, quantity)
+            WHERE p.bar_code = basket.bar_code
+            RETURNING p.id, p.bar_code, p.stock_quantity, p.stock_quantity <= p.reorder_point
+            """,
+            params
+        )
+        updated = cursor.fetchall()
+    # Stock never goes below zero, so the movement is what was actually taken.
+    record_movements(
+        (product_id, kind, balance - locked[product_id], balance, reference)
+        for product_id, _, balance, _ in updated
+    )
+    barcode_cache.invalidate([bar_code for _, bar_code, _, _ in updated])
+
+    reorder = {bar_code for _, bar_code, _, is_reorder in updated if is_reorder}
+
+    return [bar_code for bar_code in quantities if bar_code in reorder]
+
+
+PRICE_FIELDS = ('price', 'cost_price', 'stock_quantity', 'reorder_point')
+
+
+def _record_changes(diff, rows):
+    # Each row is (bar_code, *old values, *new values) in PRICE_FIELDS order.
+    count = len(PRICE_FIELDS)
+    for row in rows:
+        bar_code, old, new = row[0], row[1:count + 1], row[count + 1:2 * count + 1]
+        changes = diff.setdefault(bar_code, {})
+        for field, before, after in zip(PRICE_FIELDS, old, new):
+            if field in changes:
+                before = changes[field][0]
+            changes[field] = [before, after]
+
+
+def adjust_category_prices(cursor, adjustments):
+    """Scale price/cost_price of every active product in the given categories by a percentage."""
+    rows = ', '.join(['(%s, %s::numeric, %s::numeric)'] * len(adjustments))
+    params = []
+    for adjustment in adjustments:
+        params += [
+            adjustment['category'],
+            adjustment.get('price_percent'),
+            adjustment.get('cost_price_percent'),
+        ]
+    cursor.execute(
+        f"""
+        WITH adjustment (category, price_percent, cost_price_percent) AS (VALUES {rows}),
+        old AS (
+            SELECT p.id, p.price, p.cost_price, p.stock_quantity, p.reorder_point,
+                   a.price_percent, a.cost_price_percent
+            FROM product AS p
+            JOIN category AS c ON c.id = p.category_id_id
+            JOIN adjustment AS a ON a.category = c.name
+            WHERE p.is_active
+            ORDER BY p.id
+            FOR UPDATE OF p
+        )
+        UPDATE product AS p
+        SET price = COALESCE(ROUND(old.price * (100 + old.price_percent) / 100, 2), old.price),
+            cost_price = COALESCE(
+                ROUND(old.cost_price * (100 + old.cost_price_percent) / 100, 2), old.cost_price),
+            updated_at = NOW()
+        FROM old
+        WHERE p.id = old.id
+        RETURNING p.bar_code, old.price, old.cost_price, old.stock_quantity, old.reorder_point,
+                  p.price, p.cost_price, p.stock_quantity, p.reorder_point
+        """,
+        params
+    )
+    return cursor.fetchall()
+
+
+def apply_product_changes(cursor, items):
+    """
+    Set the given price/cost/stock/reorder fields of active products by bar
+    code. Rows whose values do not change are left untouched so catalog
+    sync does not resend them; they come back with their old values.
+    """
+    rows = ', '.join(['(%s, %s::numeric, %s::numeric, %s::integer, %s::integer)'] * len(items))
+    params = []
+    for item in items:
+        params += [item['bar_code']] + [item.get(field) for field in PRICE_FIELDS]
+    cursor.execute(
+        f"""
+        WITH change (bar_code, price, cost_price, stock_quantity, reorder_point) AS (VALUES {rows}),
+        old AS (
+            SELECT p.id, p.bar_code, p.price, p.cost_price, p.stock_quantity, p.reorder_point,
+                   COALESCE(c.price, p.price) AS new_price,
+                   COALESCE(c.cost_price, p.cost_price) AS new_cost_price,
+                   COALESCE(c.stock_quantity, p.stock_quantity) AS new_stock_quantity,
+                   COALESCE(c.reorder_point, p.reorder_point) AS new_reorder_point
+            FROM product AS p
+            JOIN change AS c ON c.bar_code = p.bar_code
+            WHERE p.is_active
+            ORDER BY p.id
+            FOR UPDATE OF p
+        ),
+        updated AS (
+            UPDATE product AS p
+            SET price = old.new_price,
+                cost_price = old.new_cost_price,
+                stock_quantity = old.new_stock_quantity,
+                reorder_point = old.new_reorder_point,
+                updated_at = NOW()
+            FROM old
+            WHERE p.id = old.id
+              AND (old.new_price, old.new_cost_price, old.new_stock_quantity, old.new_reorder_point)
+                  IS DISTINCT FROM (old.price, old.cost_price, old.stock_quantity, old.reorder_point)
+            RETURNING p.id
+        )
+        SELECT bar_code, price, cost_price, stock_quantity, reorder_point,
+               new_price, new_cost_price, new_stock_quantity, new_reorder_point, id
+        FROM old
+        """,
+        params
+    )
+    return cursor.fetchall()
+
+
+def bulk_update_products(items, adjustments):
+    """
+    Apply category percentage adjustments, then per-product values (which
+    win), in one statement each. Returns ({bar_code: {field: [old, new]}}
+    with only the fields that changed, bar codes with no active product).
+    Must run inside transaction.atomic().
+    """
+    diff = {}
+    with connection.cursor() as cursor:
+        if adjustments:
+            _record_changes(diff, adjust_category_prices(cursor, adjustments))
+        if items:
+            rows = apply_product_changes(cursor, items)
+            _record_changes(diff, rows)
+            record_movements(
+                (row[9], Kind.ADJUSTMENT, row[7] - row[3], row[7], 'bulk-update')
+                for row in rows
+            )
+    barcode_cache.invalidate(list(diff))
+
+    changes = {}
+    for bar_code, fields in diff.items():
+        changed = {field: values for field, values in fields.items() if values[0] != values[1]}
+        if changed:
+            changes[bar_code] = changed
+    not_found = [item['bar_code'] for item in items if item['bar_code'] not in diff]
+    return changes, not_found
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from report.timeseries import day_start, store_timezone
+from ..models import Product, StockMovement
+from ..ledger import stock_as_of
+from ..get_product.pagination import InvalidCursor, paginate
+
+MAX_LIMIT = 500
+MAX_BAR_CODES = 500
+
+
+def parse_moment(value, end=False):
+    """
+    An ISO datetime (store-local when naive) or a date. A date means the
+    start of that store day, or the end of it when `end` is set.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, store_timezone())
+        return moment
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day_start(day + timedelta(days=1) if end else day)
+
+
+def bad_request(message):
+    return Response({
+        'status': '2',
+        'error_message': message
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class StockHistory(APIView):
+    """Movements of one product between `start` and `end`, with the balance before and after."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, bar_code):
+        try:
+            start = parse_moment(request.query_params.get('start'))
+            end = parse_moment(request.query_params.get('end'), end=True) or timezone.now()
+            limit = min(int(request.query_params.get('limit', 100)), MAX_LIMIT)
+        except ValueError:
+            return bad_request('Invalid start, end or limit')
+
+        product = Product.objects.filter(bar_code=bar_code).values('id', 'name').first()
+        if not product:
+            return Response({
+                'status': '2',
+                'error_code': '2',
+                'error_message': 'Product not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        movements = StockMovement.objects.filter(product_id=product['id'], created_at__lte=end)
+        if start:
+            movements = movements.filter(created_at__gt=start)
+        try:
+            rows, next_cursor = paginate(
+                movements.values('id', 'kind', 'quantity', 'balance_after', 'reference', 'created_at'),
+                'created_at', request.query_params.get('cursor'), limit)
+        except InvalidCursor as ex:
+            return bad_request(str(ex))
+
+        return Response({
+            'status': '1',
+            'response': {
+                'bar_code': bar_code,
+                'name': product['name'],
+                'opening_balance': stock_as_of(start, [product['id']])[product['id']][1] if start else 0,
+                'closing_balance': stock_as_of(end, [product['id']])[product['id']][1],
+                'movements': rows,
+                'next_cursor': next_cursor
+            }
+        })
+
+
+class StockAsOf(APIView):
+    """Stock of the given products (`bar_code`, repeatable) at `at`."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        bar_codes = request.query_params.getlist('bar_code')
+        if not bar_codes or len(bar_codes) > MAX_BAR_CODES:
+            return bad_request(f'Between 1 and {MAX_BAR_CODES} bar_code parameters are required')
+        try:
+            at = parse_moment(request.query_params.get('at'), end=True) or timezone.now()
+        except ValueError:
+            return bad_request('Invalid at')
+
+        ids = Product.objects.filter(bar_code__in=bar_codes).values_list('id', flat=True)
+        balances = stock_as_of(at, list(ids))
+        return Response({
+            'status': '1',
+            'response': {
+                'at': at,
+                'stock': {bar_code: quantity for bar_code, quantity in balances.values()},
+                'not_found': sorted(set(bar_codes) - {bar_code for bar_code, _ in balances.values()})
+            }
+        })
+
+
+class StockMovementReport(APIView):
+    """Totals of all stock movements between `start` and `end`, by kind."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            start = parse_moment(request.query_params.get('start'))
+            end = parse_moment(request.query_params.get('end'), end=True) or timezone.now()
+        except ValueError:
+            return bad_request('Invalid start or end')
+        if not start:
+            return bad_request('start is required')
+
+        totals = StockMovement.objects.filter(
+            created_at__gt=start, created_at__lte=end
+        ).values('kind').annotate(
+            movements=Count('id'), quantity=Sum('quantity'), products=Count('product', distinct=True)
+        ).order_by('kind')
+        return Response({
+            'status': '1',
+            'response': {
+                'start': start,
+                'end': end,
+                'kinds': list(totals)
+            }
+        })
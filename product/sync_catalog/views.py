@@ -0,0 +1,97 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from ..models import Product
+from ..get_product.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate
+
+SYNC_FIELDS = (
+    "name", "sku", "bar_code", "name_category", "unit", "price",
+    "cost_price", "stock_quantity", "reorder_point",
+)
+SYNC_SORT = "updated_at"
+MAX_LIMIT = 1000
+
+
+def sync_watermark(rows, since):
+    """
+    Position to resume from: the last row sent, held back to now() minus
+    CATALOG_SYNC_LAG so rows stamped by a transaction that had not committed
+    yet are sent again on the next call rather than skipped.
+    """
+    last = (rows[-1][SYNC_SORT], rows[-1]["id"]) if rows else since
+    safe = (timezone.now() - timedelta(seconds=settings.CATALOG_SYNC_LAG), 0)
+    if last is None or safe < last:
+        last = safe
+    return encode_cursor(SYNC_SORT, *last)
+
+
+class SyncCatalog(APIView):
+    """
+    Products changed since `since` (the watermark of the previous call),
+    oldest change first. Without `since` the whole active catalog is sent;
+    with it, deactivated products come back as tombstones in `deleted`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 500)), MAX_LIMIT)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                "status": "2",
+                "error_message": "limit must be a positive integer"
+            }, status=400)
+
+        token = request.query_params.get("since")
+        try:
+            since = decode_cursor(token, SYNC_SORT) if token else None
+        except InvalidCursor as ex:
+            return Response({
+                "status": "2",
+                "error_message": str(ex)
+            }, status=400)
+
+        try:
+            changes = Product.objects.all()
+            if since is None:
+                changes = changes.filter(is_active=True)
+            changes = changes.annotate(
+                name_category=F("category_id__name")
+            ).values(*SYNC_FIELDS, "id", "is_active", SYNC_SORT)
+
+            rows, next_cursor = paginate(changes, SYNC_SORT, token, limit)
+            data = {
+                "products": [
+                    {field: row[field] for field in SYNC_FIELDS}
+                    for row in rows if row["is_active"]
+                ],
+                "deleted": [row["bar_code"] for row in rows if not row["is_active"]],
+                "watermark": next_cursor or sync_watermark(rows, since),
+                "has_more": next_cursor is not None,
+            }
+
+            body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+            etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                return Response(status=304, headers={"ETag": etag})
+
+            return Response({
+                "status": "1",
+                "response": data
+            }, headers={"ETag": etag})
+
+        except Exception as ex:
+            return Response({
+                "error_code": "9999",
+                "error_message": "System error",
+            })
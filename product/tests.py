@@ -1,3 +1,396 @@
-from django.test import TestCase
+import csv
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from . import barcode_cache
+from .importer import process_next_import, save_upload
+from .ledger import Kind, stock_as_of
+from .models import Category, Product, ProductImport, StockMovement, StockSnapshot
+from .services import deduct_stock
 
-# Create your tests here.
+
+class BarcodeScanTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        barcode_cache.local.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        category = Category.objects.create(name="Sữa")
+        self.product = Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=category,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=10, reorder_point=3)
+
+    def scan(self, bar_code):
+        return self.client.get(f'/api/product/scan/{bar_code}/').data
+
+    def test_hits_skip_the_database(self):
+        self.assertEqual(self.scan(self.product.bar_code)['response']['stock_quantity'], 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(barcode_cache.lookup([self.product.bar_code])[self.product.bar_code]['name'], "Sữa tươi")
+
+    def test_stock_change_invalidates_entry(self):
+        self.scan(self.product.bar_code)
+        with self.captureOnCommitCallbacks(execute=True):
+            deduct_stock([{'bar_code': self.product.bar_code, 'quantity': 8}])
+        response = self.scan(self.product.bar_code)['response']
+        self.assertEqual(response['stock_quantity'], 2)
+        self.assertTrue(response['is_reorder'])
+
+    def test_delete_invalidates_entry(self):
+        self.scan(self.product.bar_code)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/product/delete/{self.product.bar_code}/')
+        self.assertEqual(self.scan(self.product.bar_code)['status'], '2')
+
+    def test_refill_racing_an_invalidation_is_not_served(self):
+        load_products = barcode_cache.load_products
+
+        def sale_commits_after_read(bar_codes):
+            rows = load_products(bar_codes)
+            Product.objects.filter(pk=self.product.pk).update(stock_quantity=4)
+            barcode_cache.drop(bar_codes)
+            return rows
+
+        with mock.patch.object(barcode_cache, 'load_products', sale_commits_after_read):
+            self.assertEqual(self.scan(self.product.bar_code)['response']['stock_quantity'], 10)
+        barcode_cache.local.clear()
+
+        self.assertEqual(self.scan(self.product.bar_code)['response']['stock_quantity'], 4)
+
+    def test_batch_reports_unknown_codes(self):
+        response = self.client.post(
+            '/api/product/scan/', {'bar_codes': [self.product.bar_code, 'missing']}, format='json').data
+        self.assertEqual(list(response['response']['products']), [self.product.bar_code])
+        self.assertEqual(response['response']['not_found'], ['missing'])
+
+
+class ProductImportTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        override = override_settings(PRODUCT_IMPORT_DIR=self.directory.name, PRODUCT_IMPORT_CHUNK_SIZE=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        category = Category.objects.create(name="Sữa")
+        Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=category,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=10)
+
+    def upload(self, rows):
+        content = "\n".join(",".join(row) for row in rows).encode()
+        return save_upload(SimpleUploadedFile("catalog.csv", content))
+
+    def test_upserts_by_bar_code_and_reports_bad_rows(self):
+        self.upload([
+            ("name", "sku", "barCode", "category", "costPrice", "price", "quantity", "unit"),
+            ("Sữa tươi", "SUA-1", "8930000000001", "Sữa", "9500", "13000", "20", "hộp"),
+            ("Bánh mì", "BM-1", "8930000000002", "Bánh", "3000", "5000", "5", "cái"),
+            ("Bánh quy", "BQ-1", "8930000000003", "Bánh", "0", "5000", "5", "gói"),
+            ("Bánh ngọt", "SUA-1", "8930000000004", "Bánh", "3000", "5000", "5", "cái"),
+        ])
+
+        job = process_next_import()
+
+        self.assertEqual(job.status, ProductImport.Status.DONE)
+        self.assertEqual((job.created_count, job.updated_count, job.failed_count), (1, 1, 2))
+        self.assertEqual(Product.objects.get(bar_code="8930000000001").stock_quantity, 20)
+        self.assertEqual(Product.objects.get(bar_code="8930000000002").category_id.name, "Bánh")
+        with open(job.error_file, encoding="utf-8") as file:
+            failed = [row[1] for row in csv.reader(file)][1:]
+        self.assertEqual(failed, ["8930000000003", "8930000000004"])
+
+    def test_rejects_non_finite_and_out_of_range_numbers(self):
+        header = ("name", "sku", "barCode", "category", "costPrice", "price", "quantity", "unit", "reorderPoint")
+        bad = [
+            ("NaN", "5000", "5", "0"),
+            ("3000", "-Infinity", "5", "0"),
+            ("3000", "100000000", "5", "0"),
+            ("3000", "5000", "Infinity", "0"),
+            ("3000", "5000", "1e12", "0"),
+            ("3000", "5000", "5", "sNaN"),
+            ("3000", "5000", "5", "2147483648"),
+        ]
+        self.upload([header] + [
+            (f"Bánh {i}", f"BQ-{i}", f"89300000001{i}", "Bánh", cost, price, quantity, "gói", reorder)
+            for i, (cost, price, quantity, reorder) in enumerate(bad)
+        ] + [("Bánh mì", "BM-1", "8930000000002", "Bánh", "3000", "5000", "2147483647", "cái", "1e1")])
+
+        job = process_next_import()
+
+        self.assertEqual(job.status, ProductImport.Status.DONE)
+        self.assertEqual((job.created_count, job.failed_count), (1, len(bad)))
+        self.assertEqual(
+            Product.objects.filter(bar_code="8930000000002").values_list('stock_quantity', 'reorder_point').get(),
+            (2147483647, 10))
+
+    def test_missing_columns_fail_the_import(self):
+        self.upload([("name", "sku"), ("Bánh mì", "BM-1")])
+
+        job = process_next_import()
+
+        self.assertEqual(job.status, ProductImport.Status.FAILED)
+        self.assertIn("barcode", job.last_error.lower().replace("_", ""))
+
+
+class BulkUpdateTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        milk = Category.objects.create(name="Sữa")
+        bread = Category.objects.create(name="Bánh")
+        Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=milk,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=10)
+        Product.objects.create(
+            name="Sữa chua", sku="SUA-2", bar_code="8930000000002", category_id=milk,
+            unit="hộp", price=8000, cost_price=6000, stock_quantity=10)
+        Product.objects.create(
+            name="Bánh mì", sku="BM-1", bar_code="8930000000003", category_id=bread,
+            unit="cái", price=5000, cost_price=3000, stock_quantity=10)
+
+    def test_applies_adjustments_then_items_and_returns_changed_fields(self):
+        response = self.client.post('/api/product/bulk-update/', {
+            'adjustments': [{'category': 'Sữa', 'pricePercent': '10'}],
+            'items': [
+                {'barCode': '8930000000001', 'quantity': 25},
+                {'barCode': '8930000000002', 'price': '8000'},
+                {'barCode': '8930000000003', 'quantity': 10},
+                {'barCode': 'missing', 'price': '1000'},
+            ],
+        }, format='json').json()['response']
+
+        self.assertEqual(response['changes'], {
+            '8930000000001': {'price': [12000, 13200], 'stock_quantity': [10, 25]},
+        })
+        self.assertEqual(response['not_found'], ['missing'])
+        self.assertEqual(Product.objects.get(bar_code='8930000000002').price, 8000)
+
+
+class StockLedgerTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        category = Category.objects.create(name="Sữa")
+        self.product = Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=category,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=10)
+        StockSnapshot.objects.create(
+            product=self.product, taken_at=timezone.now() - timedelta(hours=1), quantity=10)
+
+    def test_sales_are_recorded_and_replayed(self):
+        deduct_stock([{'bar_code': self.product.bar_code, 'quantity': 3}], reference='ORDER-1')
+        deduct_stock([{'bar_code': self.product.bar_code, 'quantity': 2}], kind=Kind.CREDIT_SALE)
+
+        movements = StockMovement.objects.filter(product=self.product).order_by('id')
+        self.assertEqual(
+            list(movements.values_list('kind', 'quantity', 'balance_after', 'reference')),
+            [(Kind.SALE, -3, 7, 'ORDER-1'), (Kind.CREDIT_SALE, -2, 5, '')])
+        self.assertEqual(stock_as_of(timezone.now())[self.product.id][1], 5)
+        self.assertEqual(stock_as_of(timezone.now() - timedelta(minutes=30))[self.product.id][1], 10)
+
+    def test_history_reports_opening_and_closing_balance(self):
+        deduct_stock([{'bar_code': self.product.bar_code, 'quantity': 4}], reference='ORDER-1')
+        start = (timezone.now() - timedelta(minutes=30)).isoformat()
+
+        response = self.client.get(
+            f'/api/product/stock/{self.product.bar_code}/history/', {'start': start}).data['response']
+
+        self.assertEqual((response['opening_balance'], response['closing_balance']), (10, 6))
+        self.assertEqual([row['quantity'] for row in response['movements']], [-4])
+
+
+class LowStockTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        category = Category.objects.create(name="Sữa")
+        for i, (stock, reorder_point, is_active) in enumerate(
+                [(0, 5, True), (3, 5, True), (5, 5, True), (9, 5, True), (1, 5, False)]):
+            Product.objects.create(
+                name=f"Sữa {i}", sku=f"SUA-{i}", bar_code=f"893000000000{i}", category_id=category,
+                unit="hộp", price=12000, cost_price=9000, stock_quantity=stock,
+                reorder_point=reorder_point, is_active=is_active)
+
+    def test_pages_through_active_products_at_or_below_reorder_point(self):
+        first = self.client.get('/api/product/low-stock/', {'limit': 2}).data
+        second = self.client.get(
+            '/api/product/low-stock/', {'limit': 2, 'cursor': first['next_cursor']}).data
+
+        self.assertEqual([row['stock_quantity'] for row in first['response']], [0, 3])
+        self.assertEqual([row['bar_code'] for row in second['response']], ['8930000000002'])
+        self.assertIsNone(second['next_cursor'])
+
+
+class ProductListPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        category = Category.objects.create(name="Sữa")
+        for i, stock in enumerate([5, 5, 5, 3, 3, 8, 8]):
+            Product.objects.create(
+                name=f"Sữa {i}", sku=f"SUA-{i}", bar_code=f"893000000000{i}", category_id=category,
+                unit="hộp", price=12000, cost_price=9000, stock_quantity=stock)
+
+    def pages(self, sort):
+        rows, cursor = [], None
+        while True:
+            params = {'sort': sort, 'limit': 2, 'fields': 'bar_code,stock_quantity'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/api/product/products/', params).data
+            rows += data['response']
+            cursor = data['next_cursor']
+            if not cursor:
+                return rows
+
+    def test_pages_cover_duplicate_sort_values_exactly_once(self):
+        for sort, reverse in (('stock_quantity', False), ('-stock_quantity', True)):
+            with self.subTest(sort=sort):
+                rows = self.pages(sort)
+                bar_codes = [row['bar_code'] for row in rows]
+                self.assertEqual(sorted(bar_codes), sorted(set(bar_codes)))
+                self.assertEqual(len(bar_codes), 7)
+                stocks = [row['stock_quantity'] for row in rows]
+                self.assertEqual(stocks, sorted(stocks, reverse=reverse))
+
+    def test_bad_cursors_are_rejected(self):
+        cursor = self.client.get(
+            '/api/product/products/', {'sort': 'price', 'limit': 2}).data['next_cursor']
+
+        malformed = self.client.get('/api/product/products/', {'cursor': 'not-a-cursor'})
+        other_sort = self.client.get('/api/product/products/', {'cursor': cursor})
+
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(other_sort.status_code, 400)
+
+
+class CatalogSyncTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(User.objects.create_user('0911111111', password=None))
+        category = Category.objects.create(name="Sữa")
+        self.products = [
+            Product.objects.create(
+                name=f"Sữa {i}", sku=f"SUA-{i}", bar_code=f"893000000000{i}", category_id=category,
+                unit="hộp", price=12000, cost_price=9000, stock_quantity=10)
+            for i in range(2)
+        ]
+
+    def sync(self, since=None, **headers):
+        params = {'since': since} if since else {}
+        return self.client.get('/api/product/sync/', params, **headers)
+
+    def bar_codes(self, response):
+        return sorted(product['bar_code'] for product in response.data['response']['products'])
+
+    @override_settings(CATALOG_SYNC_LAG=60)
+    def test_watermark_is_held_back_by_the_sync_lag(self):
+        first = self.sync().data['response']
+        again = self.sync(first['watermark'])
+
+        self.assertFalse(first['has_more'])
+        # Both rows are younger than the lag, so they are sent again.
+        self.assertEqual(self.bar_codes(again), ['8930000000000', '8930000000001'])
+
+    @override_settings(CATALOG_SYNC_LAG=0)
+    def test_deactivated_products_come_back_as_tombstones(self):
+        watermark = self.sync().data['response']['watermark']
+        self.assertEqual(self.bar_codes(self.sync(watermark)), [])
+
+        self.products[0].is_active = False
+        self.products[0].save()
+        response = self.sync(watermark).data['response']
+
+        self.assertEqual(response['products'], [])
+        self.assertEqual(response['deleted'], ['8930000000000'])
+
+    @override_settings(CATALOG_SYNC_LAG=0)
+    def test_unchanged_payload_answers_not_modified(self):
+        first = self.sync()
+        etag = first['ETag']
+
+        self.assertEqual(self.sync(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.products[1].price = 13000
+        self.products[1].save()
+        self.assertEqual(self.sync(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class DeductStockTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Sữa")
+        self.milk = Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=category,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=5, reorder_point=2)
+        self.yogurt = Product.objects.create(
+            name="Sữa chua", sku="SUA-2", bar_code="8930000000002", category_id=category,
+            unit="hộp", price=8000, cost_price=6000, stock_quantity=10, reorder_point=2)
+
+    def test_shortfall_clamps_at_zero_and_records_what_was_taken(self):
+        reorder = deduct_stock([
+            {'bar_code': self.milk.bar_code, 'quantity': 3},
+            {'bar_code': self.milk.bar_code, 'quantity': 4},
+            {'bar_code': self.yogurt.bar_code, 'quantity': 1},
+            {'bar_code': 'missing', 'quantity': 1},
+        ], reference='ORDER-1')
+
+        self.milk.refresh_from_db()
+        self.yogurt.refresh_from_db()
+        self.assertEqual((self.milk.stock_quantity, self.yogurt.stock_quantity), (0, 9))
+        self.assertEqual(reorder, [self.milk.bar_code])
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list('product__bar_code', 'quantity', 'balance_after')),
+            [(self.milk.bar_code, -5, 0), (self.yogurt.bar_code, -1, 9)])
+
+    def test_empty_or_unknown_baskets_change_nothing(self):
+        self.assertEqual(deduct_stock([{'bar_code': 'missing', 'quantity': 1}]), [])
+        self.assertEqual(deduct_stock([{'bar_code': self.milk.bar_code, 'quantity': 0}]), [])
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class ConcurrentDeductStockTests(TransactionTestCase):
+
+    def test_concurrent_sales_of_one_product_each_take_their_units(self):
+        category = Category.objects.create(name="Sữa")
+        product = Product.objects.create(
+            name="Sữa tươi", sku="SUA-1", bar_code="8930000000001", category_id=category,
+            unit="hộp", price=12000, cost_price=9000, stock_quantity=20)
+        errors = []
+
+        def sell():
+            try:
+                with transaction.atomic():
+                    deduct_stock([{'bar_code': product.bar_code, 'quantity': 3}])
+            except Exception as ex:
+                errors.append(ex)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sell) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(errors, [])
+        self.assertEqual(product.stock_quantity, 0)
+        movements = list(StockMovement.objects.order_by('id').values_list('quantity', 'balance_after'))
+        # Six sales get 3 units, one gets the last 2 and one finds none.
+        self.assertEqual(sum(quantity for quantity, _ in movements), -20)
+        self.assertEqual([balance for _, balance in movements], [17, 14, 11, 8, 5, 2, 0])
@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from ..models import Product, Category
 from .serializer import UpdateProductSerializer
 from django.db import transaction
+from .. import barcode_cache
+from ..ledger import Kind, record_movements
 
 
 class UpdateProductView(APIView):
@@ -43,6 +45,10 @@ class UpdateProductView(APIView):
 
         with transaction.atomic():
             try:
+                # Lock the row so a sale running meanwhile is not overwritten
+                # and the adjustment recorded below matches the change.
+                product = Product.objects.select_for_update().get(pk=product.pk)
+                previous_quantity = product.stock_quantity
                 product.name = request.data.get('productName')
                 product.sku = request.data.get('sku')
                 product.price = request.data.get('price')
@@ -51,6 +57,11 @@ class UpdateProductView(APIView):
                 product.category_id = category
                 product.stock_quantity = request.data.get('quantity')
                 product.save()
+                quantity = int(product.stock_quantity)
+                record_movements([(
+                    product.id, Kind.ADJUSTMENT, quantity - previous_quantity, quantity, 'update'
+                )])
+                barcode_cache.invalidate([product.bar_code])
 
                 return Response({
                     'status': '1',
@@ -5,12 +5,29 @@ from .get_product.views import GetProduct
 from .delete_product.views import DeleteProductView
 from .update_product.views import UpdateProductView
 from .bulk_create.views import BulkCreateProducts
+from .sync_catalog.views import SyncCatalog
+from .scan_barcode.views import ScanBarcode, ScanBarcodeBatch
+from .bulk_update.views import BulkUpdateProducts
+from .import_products.views import ImportProducts, ProductImportStatus, ProductImportErrors
+from .stock_ledger.views import StockHistory, StockAsOf, StockMovementReport
+from .low_stock.views import LowStockProducts
 
 urlpatterns = [
     path('create/', CreateProduct.as_view()),
     path('categories/', GetCategory.as_view()),
     path('products/', GetProduct.as_view()),
+    path('low-stock/', LowStockProducts.as_view()),
+    path('sync/', SyncCatalog.as_view()),
+    path('scan/', ScanBarcodeBatch.as_view()),
+    path('scan/<str:bar_code>/', ScanBarcode.as_view()),
     path('delete/<str:bar_code>/', DeleteProductView.as_view()),
     path('update/', UpdateProductView.as_view()),
     path('bulk-create/', BulkCreateProducts.as_view(), name='bulk-create-products'),
+    path('bulk-update/', BulkUpdateProducts.as_view(), name='bulk-update-products'),
+    path('import/', ImportProducts.as_view(), name='import-products'),
+    path('import/<int:pk>/', ProductImportStatus.as_view()),
+    path('import/<int:pk>/errors/', ProductImportErrors.as_view()),
+    path('stock/as-of/', StockAsOf.as_view()),
+    path('stock/movements/', StockMovementReport.as_view()),
+    path('stock/<str:bar_code>/history/', StockHistory.as_view()),
 ]
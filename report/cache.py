@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .timeseries import store_timezone, store_today
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'report'
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+# Longer custom ranges are computed directly rather than stamped day by day.
+MAX_CACHED_DAYS = 800
+
+# Threads of one process asking for the same entry wait on a local lock
+# instead of polling the shared cache.
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+GENERATION_KEY = f'{KEY_PREFIX}:generation'
+
+
+def day_version_key(day):
+    return f'{KEY_PREFIX}:day:{day.isoformat()}'
+
+
+def covered_days(first_day, last_day):
+    return [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def current_versions(version_keys):
+    """
+    Versions are random tokens rather than counters, so a version key lost
+    to eviction comes back as a token no cached entry was stamped with.
+    """
+    versions = cache.get_many(version_keys)
+    missing = [key for key in version_keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, new_version(), None)
+        # Another process may have won the add; use whatever it stored.
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in version_keys]
+
+
+def entry_key(endpoint, params, first_day, last_day):
+    """
+    Entry keys embed the version of every store-local day the response
+    reads, so bumping one day's version orphans exactly the entries that
+    cover it.
+    """
+    days = covered_days(first_day, last_day)
+    version_keys = [GENERATION_KEY] + [day_version_key(day) for day in days]
+    stamp = current_versions(version_keys)
+    if None in stamp:
+        raise LookupError("Report cache versions could not be stored")
+    digest = hashlib.sha1(
+        json.dumps([endpoint, params, str(first_day), str(last_day), stamp],
+                   sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'{KEY_PREFIX}:{endpoint}:{digest}'
+
+
+def entry_timeout(last_day):
+    if last_day >= store_today():
+        return settings.REPORT_CACHE_LIVE_TTL
+    return settings.REPORT_CACHE_TTL
+
+
+def cached_report(endpoint, params, first_day, last_day, compute):
+    """
+    Return the cached response for `endpoint` over the days first_day..last_day,
+    calling `compute()` on a miss. Concurrent misses for the same entry run
+    `compute()` once; the others wait for its result.
+    """
+    if (last_day - first_day).days >= MAX_CACHED_DAYS:
+        return compute()
+
+    try:
+        key = entry_key(endpoint, params, first_day, last_day)
+        value = cache.get(key)
+    except Exception as ex:
+        logger.warning("Report cache unavailable: %s", ex)
+        return compute()
+    if value is not None:
+        return value
+
+    with _local_locks[hash(key) % len(_local_locks)]:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f'{key}:lock'
+        try:
+            acquired, value = wait_for_lock(lock_key, key)
+        except Exception as ex:
+            logger.warning("Report cache unavailable: %s", ex)
+            return compute()
+        if value is not None:
+            return value
+        if not acquired:
+            return compute()
+
+        try:
+            value = compute()
+            try:
+                cache.set(key, value, entry_timeout(last_day))
+            except Exception as ex:
+                logger.warning("Report cache write failed for %s: %s", key, ex)
+        finally:
+            try:
+                cache.delete(lock_key)
+            except Exception as ex:
+                # The lock times out on its own after LOCK_TIMEOUT.
+                logger.warning("Report cache unlock failed for %s: %s", key, ex)
+        return value
+
+
+def wait_for_lock(lock_key, key):
+    """
+    Take the compute lock for `key`, or wait for the process holding it to
+    store the entry. Returns (acquired, cached value or None); neither
+    means the wait timed out.
+    """
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Another process is computing this entry.
+        if time.monotonic() >= deadline:
+            return False, None
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return False, value
+    return True, None
+
+
+def bump_version(key):
+    try:
+        cache.set(key, new_version(), None)
+    except Exception as ex:
+        logger.warning("Report cache invalidation failed for %s: %s", key, ex)
+
+
+def invalidate_day(day):
+    bump_version(day_version_key(day))
+
+
+def invalidate_all():
+    bump_version(GENERATION_KEY)
+
+
+def invalidate_payment(payment):
+    """Drop cached reports covering the day of `payment` once the transaction commits."""
+    day = timezone.localtime(payment.created_at, timezone=store_timezone()).date()
+    transaction.on_commit(partial(invalidate_day, day))
@@ -0,0 +1,64 @@
+from django.db.models import Sum, Count, Q
+from payments.models import Payment
+
+
+def window_filter(start, end):
+    return Q(created_at__gte=start, created_at__lt=end)
+
+
+def compare_periods(current, previous):
+    """
+    Revenue, orders, cost, profit and customer counts of paid payments for
+    the current and previous window, computed in a single scan with
+    FILTER (WHERE ...) aggregates over the payment snapshot columns.
+    Windows are half-open (start, end) pairs.
+    """
+    windows = {
+        'current': window_filter(*current),
+        'previous': window_filter(*previous),
+    }
+    known = Q(buyer_phone__isnull=False) & ~Q(buyer_phone='')
+
+    aggregates = {}
+    for name, in_window in windows.items():
+        aggregates.update({
+            f'{name}_revenue': Sum('amount', filter=in_window),
+            f'{name}_orders': Count('id', filter=in_window),
+            f'{name}_cost': Sum('total_cost', filter=in_window),
+            f'{name}_profit': Sum('total_profit', filter=in_window),
+            f'{name}_customers': Count('buyer_phone', distinct=True, filter=in_window & known),
+            f'{name}_walk_ins': Count('id', filter=in_window & ~known),
+        })
+
+    totals = Payment.objects.filter(
+        windows['current'] | windows['previous'],
+        is_active=True,
+        status='paid'
+    ).aggregate(**aggregates)
+
+    result = {}
+    for name in windows:
+        revenue = int(totals[f'{name}_revenue'] or 0)
+        known_customers = totals[f'{name}_customers']
+        result[name] = {
+            'revenue': revenue,
+            'orders': totals[f'{name}_orders'],
+            'cost': int(totals[f'{name}_cost'] or 0),
+            'profit': int(totals[f'{name}_profit'] or 0),
+            # Walk-in sales without a phone count as one customer group.
+            'customers': known_customers + (1 if totals[f'{name}_walk_ins'] else 0),
+            'known_customers': known_customers,
+        }
+    return result
+
+
+def calculate_growth(previous, current):
+    if previous == 0:
+        return 100 if current > 0 else 0
+    return ((current - previous) / previous) * 100
+
+
+def calculate_profit_margin(revenue, profit):
+    if revenue == 0:
+        return 0
+    return (profit / revenue) * 100
@@ -2,12 +2,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField, Q
-from django.utils.timezone import now
-from datetime import timedelta
-import json
-from product.models import Product
-from payments.models import Payment
+from django.db.models import Sum, F, DecimalField, Max
+from functools import partial
+from payments.models import Payment, PaymentItem
+from ..cache import cached_report
+from ..comparison import compare_periods, calculate_growth, calculate_profit_margin
+from ..timeseries import MONTH, bucket_series, day_start, store_today
 from datetime import timedelta, datetime
 
 class GetBusinessReport(APIView):
@@ -24,70 +24,22 @@ class GetBusinessReport(APIView):
                 end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
             else:
                 start_date = self.get_start_date(period)
-                end_date = now().date()
-
-            current_payments = Payment.objects.filter(
-                is_active=True,
-                status='paid',
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date
-            )
+                end_date = store_today()
 
             prev_start = start_date - (end_date - start_date)
             prev_end = start_date - timedelta(days=1)
-            prev_payments = Payment.objects.filter(
-                is_active=True,
-                status='paid',
-                created_at__date__gte=prev_start,
-                created_at__date__lte=prev_end
+            response = cached_report(
+                'business_report',
+                {'period': period},
+                prev_start,
+                end_date,
+                partial(self.get_summary, start_date, end_date,
+                        prev_start, prev_end)
             )
 
-            current_revenue = current_payments.aggregate(
-                total=Sum('amount'))['total'] or 0
-            prev_revenue = prev_payments.aggregate(
-                total=Sum('amount'))['total'] or 0
-
-            current_cost = self.calculate_total_cost(current_payments)
-            prev_cost = self.calculate_total_cost(prev_payments)
-
-            current_profit = int(current_revenue) - current_cost
-            prev_profit = int(prev_revenue) - prev_cost
-
-            current_orders = current_payments.count()
-            prev_orders = prev_payments.count()
-
-            current_margin = self.calculate_profit_margin(
-                int(current_revenue), current_profit)
-            prev_margin = self.calculate_profit_margin(
-                int(prev_revenue), prev_profit)
-
-            revenue_growth = self.calculate_growth(
-                int(prev_revenue), int(current_revenue))
-            profit_growth = self.calculate_growth(prev_profit, current_profit)
-            order_growth = self.calculate_growth(prev_orders, current_orders)
-            margin_growth = current_margin - prev_margin
-
-            top_products = self.get_top_products(current_payments)
-            monthly_revenue = self.get_monthly_revenue(
-                start_date, end_date, current_payments)
-
             return Response({
                 "status": "1",
-                "response": {
-                    "total_revenue": int(current_revenue),
-                    "total_profit": current_profit,
-                    "profit_margin": float(current_margin),
-                    "orders_count": current_orders,
-                    "revenue_growth": float(revenue_growth),
-                    "profit_growth": float(profit_growth),
-                    "order_growth": float(order_growth),
-                    "margin_growth": float(margin_growth),
-                    "revenue_comparison": int(current_revenue) - int(prev_revenue),
-                    "profit_comparison": current_profit - prev_profit,
-                    "order_comparison": current_orders - prev_orders,
-                    "top_products": top_products,
-                    "monthly_revenue": monthly_revenue,
-                }
+                "response": response
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -96,8 +48,62 @@ class GetBusinessReport(APIView):
                 "error_message": f"System error: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_summary(self, start_date, end_date, prev_start, prev_end):
+        current_window = self.get_window(start_date, end_date)
+        windows = compare_periods(
+            current_window, self.get_window(prev_start, prev_end))
+
+        current_payments = Payment.objects.filter(
+            is_active=True,
+            status='paid',
+            created_at__gte=current_window[0],
+            created_at__lt=current_window[1]
+        )
+
+        current = windows['current']
+        previous = windows['previous']
+
+        current_revenue = current['revenue']
+        prev_revenue = previous['revenue']
+
+        current_profit = current['profit']
+        prev_profit = previous['profit']
+
+        current_orders = current['orders']
+        prev_orders = previous['orders']
+
+        current_margin = calculate_profit_margin(
+            current_revenue, current_profit)
+        prev_margin = calculate_profit_margin(
+            prev_revenue, prev_profit)
+
+        revenue_growth = calculate_growth(prev_revenue, current_revenue)
+        profit_growth = calculate_growth(prev_profit, current_profit)
+        order_growth = calculate_growth(prev_orders, current_orders)
+        margin_growth = current_margin - prev_margin
+
+        top_products = self.get_top_products(current_payments)
+        monthly_revenue = self.get_monthly_revenue(
+            start_date, end_date, prev_start, prev_end)
+
+        return {
+            "total_revenue": int(current_revenue),
+            "total_profit": current_profit,
+            "profit_margin": float(current_margin),
+            "orders_count": current_orders,
+            "revenue_growth": float(revenue_growth),
+            "profit_growth": float(profit_growth),
+            "order_growth": float(order_growth),
+            "margin_growth": float(margin_growth),
+            "revenue_comparison": int(current_revenue) - int(prev_revenue),
+            "profit_comparison": current_profit - prev_profit,
+            "order_comparison": current_orders - prev_orders,
+            "top_products": top_products,
+            "monthly_revenue": monthly_revenue,
+        }
+
     def get_start_date(self, period):
-        today = now().date()
+        today = store_today()
         if period == 'week':
             return today - timedelta(days=7)
         elif period == 'year':
@@ -105,85 +111,45 @@ class GetBusinessReport(APIView):
         else:
             return today - timedelta(days=30)
 
-    def calculate_total_cost(self, payments):
-        total_cost = 0
-        for payment in payments:
-            if payment.items:
-                try:
-                    items = json.loads(payment.items) if isinstance(
-                        payment.items, str) else payment.items
-                    for item in items:
-                        cost_price = float(item.get('cost_price', 0))
-                        quantity = int(item.get('quantity', 0))
-                        total_cost += cost_price * quantity
-                except (json.JSONDecodeError, TypeError, ValueError):
-                    pass
-        return total_cost
+    def get_window(self, start_date, end_date):
+        return day_start(start_date), day_start(end_date + timedelta(days=1))
 
     def get_top_products(self, payments):
-        product_sales = {}
-
-        for payment in payments:
-            if payment.items:
-                try:
-                    items = json.loads(payment.items) if isinstance(
-                        payment.items, str) else payment.items
-                    for item in items:
-                        sku = item.get('sku', 'unknown')
-                        name = item.get('name', '')
-                        quantity = int(item.get('quantity', 0))
-                        price = float(item.get('price', 0))
-
-                        if sku not in product_sales:
-                            product_sales[sku] = {
-                                'name': name,
-                                'sku': sku,
-                                'quantity': 0,
-                                'revenue': 0
-                            }
-
-                        product_sales[sku]['quantity'] += quantity
-                        product_sales[sku]['revenue'] += int(quantity * price)
-                except (json.JSONDecodeError, TypeError, ValueError):
-                    pass
-
-        sorted_products = sorted(
-            product_sales.values(),
-            key=lambda x: x['revenue'],
-            reverse=True
-        )[:5]
-
-        return sorted_products
-
-    def get_monthly_revenue(self, start_date, end_date, payments):
-        monthly_data = {}
-
-        current = start_date
-        while current <= end_date:
-            month_key = current.strftime('%Y-%m')
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {
-                    'month': month_key,
-                    'revenue': 0,
-                    'orders': 0
-                }
-            current += timedelta(days=1)
-
-        for payment in payments:
-            month_key = payment.created_at.strftime('%Y-%m')
-            if month_key in monthly_data:
-                monthly_data[month_key]['revenue'] += int(payment.amount)
-                monthly_data[month_key]['orders'] += 1
-
-        sorted_months = sorted(monthly_data.items())
-        return [data for _, data in sorted_months]
-
-    def calculate_growth(self, previous, current):
-        if previous == 0:
-            return 0 if current == 0 else 100
-        return ((current - previous) / previous) * 100
-
-    def calculate_profit_margin(self, revenue, profit):
-        if revenue == 0:
-            return 0
-        return (profit / revenue) * 100
+        product_sales = PaymentItem.objects.filter(
+            payment__in=payments
+        ).values('sku').annotate(
+            product_name=Max('name'),
+            total_quantity=Sum('quantity'),
+            revenue=Sum(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=19, decimal_places=2)
+            )
+        ).order_by('-revenue')[:5]
+
+        return [
+            {
+                'name': row['product_name'],
+                'sku': row['sku'],
+                'quantity': row['total_quantity'],
+                'revenue': int(row['revenue'] or 0)
+            }
+            for row in product_sales
+        ]
+
+    def get_monthly_revenue(self, start_date, end_date, prev_start, prev_end):
+        series = bucket_series(
+            MONTH,
+            (start_date, end_date),
+            (prev_start, prev_end),
+            fields=('revenue', 'orders')
+        )
+        return [
+            {
+                'month': point['bucket'].strftime('%Y-%m'),
+                'revenue': point['revenue'],
+                'orders': point['orders'],
+                'previous_revenue': point['previous_revenue'],
+                'previous_orders': point['previous_orders']
+            }
+            for point in series
+        ]
@@ -0,0 +1,218 @@
+import gc
+import hashlib
+import hmac
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User
+from payments.models import Payment
+from payments.views import CHECKSUM_KEY
+from product.models import Product
+from report.cache import invalidate_all
+
+BENCHMARK_PHONE = '0900000000'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure latency percentiles, SQL query counts and peak memory of the main API endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help="Only run this endpoint (repeatable)")
+        parser.add_argument('--cold', action='store_true',
+                            help="Drop cached dashboard/report responses before every request")
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--baseline', help="Earlier JSON result to compare against")
+
+    def handle(self, *args, **options):
+        self.client = APIClient(SERVER_NAME='localhost')
+        user = self.benchmark_user()
+        self.client.force_authenticate(user)
+        # Async views are plain Django views and read the token themselves.
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        self.cold = options['cold']
+
+        endpoints = self.endpoints()
+        selected = options['endpoints'] or list(endpoints)
+        unknown = set(selected) - set(endpoints)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        results = {}
+        for name in selected:
+            request = endpoints[name]
+            self.stdout.write(f"Benchmarking {name}...")
+            results[name] = self.measure(request, options['iterations'], options['warmup'])
+            self.report(name, results[name])
+
+        output = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'cold_cache': self.cold,
+            'dataset': {
+                'products': Product.objects.count(),
+                'payments': Payment.objects.count(),
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(output, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    def benchmark_user(self):
+        user = User.objects.filter(phone_number=BENCHMARK_PHONE).first()
+        if not user:
+            user = User.objects.create_user(BENCHMARK_PHONE, password=None)
+        return user
+
+    def endpoints(self):
+        product = Product.objects.filter(is_active=True, stock_quantity__gt=10).order_by('id').first()
+        search_term = product.name[:4] if product else 'ca'
+        basket = [{
+            'bar_code': product.bar_code, 'sku': product.sku, 'name': product.name,
+            'quantity': 1, 'price': int(product.price), 'cost_price': int(product.cost_price),
+        }] if product else []
+
+        return {
+            'dashboard': (False, lambda: self.client.get('/api/home/get/dashboard/', {'period': 'today'})),
+            'dashboard_month': (False, lambda: self.client.get('/api/home/get/dashboard/', {'period': 'month'})),
+            'business_report': (False, lambda: self.client.get('/api/report/get/', {'period': 'month'})),
+            'business_report_year': (False, lambda: self.client.get('/api/report/get/', {'period': 'year'})),
+            'product_list': (False, lambda: self.client.get('/api/product/products/')),
+            'customer_list': (False, lambda: self.client.get('/api/debit/get/customer/')),
+            'quick_search': (False, lambda: self.client.get('/api/home/quick/search/', {'q': search_term})),
+            'barcode_scan': (False, lambda: self.client.get(
+                f"/api/product/scan/{product.bar_code if product else '0'}/")),
+            'webhook': (True, self.post_webhook),
+            'cash_checkout': (True, lambda: self.client.post(
+                '/api/payments/cash/', {'amount': basket[0]['price'] if basket else 0, 'items': basket},
+                format='json')),
+        }
+
+    def post_webhook(self):
+        payment = Payment.objects.filter(status='pending').order_by('-id').first()
+        if not payment:
+            payment = Payment.objects.create(
+                order_code=f"BENCH{time.time_ns()}", amount=10000, status='pending', items=[])
+        data = {
+            'orderCode': payment.order_code,
+            'amount': payment.amount,
+            'paymentLinkId': f"bench-{time.time_ns()}",
+        }
+        canonical = "&".join(f"{key}={data[key]}" for key in sorted(data))
+        signature = hmac.new(
+            CHECKSUM_KEY.encode(), canonical.encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/api/payments/webhook/',
+            {'code': '00', 'desc': 'success', 'data': data, 'signature': signature},
+            format='json')
+
+    def call(self, request):
+        writes, send = request
+        if self.cold:
+            invalidate_all()
+        if not writes:
+            return send()
+        # Write endpoints run inside a transaction that is rolled back so
+        # repeated runs measure the same dataset.
+        try:
+            with transaction.atomic():
+                response = send()
+                raise Rollback
+        except Rollback:
+            return response
+
+    def measure(self, request, iterations, warmup):
+        for _ in range(warmup):
+            self.call(request)
+
+        latencies = []
+        query_counts = []
+        query_times = []
+        statuses = set()
+        gc.collect()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = self.call(request)
+                latencies.append((time.perf_counter() - started) * 1000)
+            statuses.add(response.status_code)
+            query_counts.append(len(queries.captured_queries))
+            query_times.append(sum(float(query['time']) for query in queries.captured_queries) * 1000)
+
+        # tracemalloc slows every allocation down, so peak memory comes from
+        # a separate request instead of skewing the timed ones.
+        tracemalloc.start()
+        self.call(request)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.50), 3),
+                'p90': round(percentile(latencies, 0.90), 3),
+                'p95': round(percentile(latencies, 0.95), 3),
+                'p99': round(percentile(latencies, 0.99), 3),
+                'max': round(max(latencies), 3),
+                'mean': round(statistics.fmean(latencies), 3),
+            },
+            'queries': {
+                'min': min(query_counts),
+                'max': max(query_counts),
+                'mean': round(statistics.fmean(query_counts), 2),
+                'db_time_ms_mean': round(statistics.fmean(query_times), 3),
+            },
+            'peak_memory_kb': round(peak / 1024, 1),
+            'status_codes': sorted(statuses),
+        }
+
+    def report(self, name, result):
+        latency = result['latency_ms']
+        self.stdout.write(
+            f"  p50 {latency['p50']:.2f}ms  p95 {latency['p95']:.2f}ms  p99 {latency['p99']:.2f}ms  "
+            f"queries {result['queries']['mean']}  peak {result['peak_memory_kb']}KB  "
+            f"status {result['status_codes']}")
+
+    def compare(self, path, results):
+        with open(path) as file:
+            baseline = json.load(file).get('endpoints', {})
+
+        self.stdout.write(f"Compared with {path}:")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            old_p95 = before['latency_ms']['p95']
+            new_p95 = result['latency_ms']['p95']
+            change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0
+            line = (
+                f"  {name}: p95 {old_p95:.2f} -> {new_p95:.2f}ms ({change:+.1f}%), "
+                f"queries {before['queries']['mean']} -> {result['queries']['mean']}"
+            )
+            if change > 10 or result['queries']['mean'] > before['queries']['mean']:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
@@ -0,0 +1,21 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from report.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute hourly and daily sales rollups from paid payments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help="Only rebuild buckets from this date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        date_from = options.get('date_from')
+        if date_from:
+            try:
+                date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--date-from must be YYYY-MM-DD")
+
+        rebuild_rollups(date_from)
+        self.stdout.write(self.style.SUCCESS("Sales rollups rebuilt"))
@@ -0,0 +1,270 @@
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from debit.models import Customer, Debit
+from payments.models import Payment, PaymentItem
+from product.models import Category, Product
+from report.rollups import rebuild_rollups
+from report.timeseries import store_timezone, store_today
+
+CATEGORIES = [
+    "Rau củ", "Trái cây", "Thịt", "Hải sản", "Sữa", "Đồ uống", "Bánh kẹo",
+    "Gia vị", "Mì gói", "Gạo", "Đồ đông lạnh", "Hóa phẩm", "Chăm sóc cá nhân",
+]
+UNITS = ["cái", "kg", "gói", "hộp", "chai", "lon", "bịch"]
+FIRST_NAMES = ["An", "Bình", "Chi", "Dũng", "Hà", "Hùng", "Lan", "Linh", "Minh", "Nam", "Phương", "Tú"]
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Vũ", "Đặng", "Bùi"]
+# Share of the day's orders by store-local hour (the store opens 6:00-22:00).
+HOUR_WEIGHTS = [0] * 6 + [2, 5, 6, 5, 4, 5, 6, 4, 3, 3, 4, 7, 9, 8, 5, 3] + [0] * 2
+
+
+def copy_rows(cursor, model, columns, rows):
+    """Stream `rows` into the model's table with COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {model._meta.db_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    return count
+
+
+def next_id(cursor, model):
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {model._meta.db_table}")
+    return cursor.fetchone()[0]
+
+
+def reset_sequence(cursor, model):
+    table = model._meta.db_table
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"(SELECT COALESCE(MAX(id), 1) FROM {table}))")
+
+
+def column(model, field):
+    return model._meta.get_field(field).column
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a synthetic grocery store dataset (products, payments with line items, customers, debits) with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000)
+        parser.add_argument('--payments', type=int, default=5000000)
+        parser.add_argument('--customers', type=int, default=100000)
+        parser.add_argument('--debits', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=365, help="Spread payments over this many past days")
+        parser.add_argument('--max-items', type=int, default=6, help="Maximum line items per payment")
+        parser.add_argument('--chunk-size', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['days'] < 1:
+            raise CommandError("--products and --days must be at least 1")
+
+        self.random = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.now = timezone.now()
+        # Rows of this run share a prefix so several runs can coexist.
+        self.tag = f"{options['seed']}-{int(time.time())}"
+
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            categories = self.seed_categories(cursor)
+            products = self.seed_products(cursor, categories, options['products'])
+            phones = self.seed_customers(cursor, options['customers'])
+            self.seed_debits(cursor, options['debits'], len(phones))
+            self.seed_payments(cursor, products, phones, options)
+
+            for model in (Category, Product, Customer, Debit, Payment, PaymentItem):
+                reset_sequence(cursor, model)
+
+        self.stdout.write("Rebuilding sales rollups...")
+        rebuild_rollups()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ANALYZE category, product, customer, debit, payment, payment_item, "
+                "sales_rollup_hourly, sales_rollup_daily")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded store data in {time.monotonic() - started:.1f}s"))
+
+    def seed_categories(self, cursor):
+        existing = dict(Category.objects.values_list('name', 'id'))
+        start = next_id(cursor, Category)
+        missing = [name for name in CATEGORIES if name not in existing]
+        rows = [
+            (start + i, name, self.now, self.now, True)
+            for i, name in enumerate(missing)
+        ]
+        with transaction.atomic():
+            copy_rows(cursor, Category, ['id', 'name', 'created_at', 'updated_at', 'is_active'], rows)
+        existing.update({name: start + i for i, name in enumerate(missing)})
+        return [existing[name] for name in CATEGORIES]
+
+    def seed_products(self, cursor, categories, count):
+        start = next_id(cursor, Product)
+        self.product_start = start
+        columns = [
+            'id', 'name', 'sku', 'bar_code', column(Product, 'category_id'), 'unit',
+            'price', 'cost_price', 'stock_quantity', 'reorder_point',
+            'created_at', 'updated_at', 'is_active',
+        ]
+        products = []
+        rows = []
+        for i in range(count):
+            product_id = start + i
+            cost = self.random.randint(5, 400) * 1000
+            price = int(cost * self.random.uniform(1.1, 1.5)) // 500 * 500
+            product = {
+                'bar_code': f"89{product_id:011d}",
+                'sku': f"SP{self.tag}-{product_id}",
+                'name': f"{self.random.choice(CATEGORIES)} {self.tag}-{product_id}",
+                'price': price,
+                'cost_price': cost,
+            }
+            products.append(product)
+            rows.append((
+                product_id, product['name'], product['sku'], product['bar_code'],
+                self.random.choice(categories), self.random.choice(UNITS),
+                price, cost, self.random.randint(0, 500), self.random.randint(5, 30),
+                self.now, self.now, True,
+            ))
+        with transaction.atomic():
+            copy_rows(cursor, Product, columns, rows)
+            # Opening balances for the stock ledger.
+            cursor.execute(
+                "INSERT INTO stock_snapshot (product_id, taken_at, quantity, created_at, updated_at, is_active) "
+                "SELECT id, created_at, stock_quantity, created_at, created_at, TRUE "
+                "FROM product WHERE id >= %s",
+                [start])
+        self.stdout.write(f"Loaded {count} products")
+        return products
+
+    def seed_customers(self, cursor, count):
+        start = next_id(cursor, Customer)
+        columns = ['id', 'customer_code', 'name', 'phone', 'address', 'created_at', 'updated_at', 'is_active']
+        phones = []
+        rows = []
+        for i in range(count):
+            customer_id = start + i
+            phone = f"09{customer_id % 100000000:08d}"
+            phones.append((customer_id, phone))
+            rows.append((
+                customer_id, f"KH{self.tag}-{customer_id}",
+                f"{self.random.choice(LAST_NAMES)} {self.random.choice(FIRST_NAMES)}",
+                phone, f"{self.random.randint(1, 999)} Lê Lợi", self.now, self.now, True,
+            ))
+        with transaction.atomic():
+            copy_rows(cursor, Customer, columns, rows)
+        self.stdout.write(f"Loaded {count} customers")
+        self.customer_start = start
+        return phones
+
+    def seed_debits(self, cursor, count, customers):
+        if not customers:
+            return
+        start = next_id(cursor, Debit)
+        columns = [
+            'id', 'debit_amount', 'note', 'paid_amount', 'total_amount',
+            column(Debit, 'customer'), 'due_date', 'created_at', 'updated_at', 'is_active',
+        ]
+        today = store_today()
+        rows = []
+        for i in range(count):
+            total = self.random.randint(1, 200) * 10000
+            paid = self.random.choice([0, 0, total // 2, total])
+            created = self.now - timedelta(days=self.random.randint(0, 365))
+            rows.append((
+                start + i, total, "Ghi nợ", paid, total,
+                self.customer_start + self.random.randrange(customers),
+                today + timedelta(days=self.random.randint(-60, 60)),
+                created, created, True,
+            ))
+        with transaction.atomic():
+            copy_rows(cursor, Debit, columns, rows)
+        self.stdout.write(f"Loaded {count} debits")
+
+    def seed_payments(self, cursor, products, phones, options):
+        payment_columns = [
+            'id', 'order_code', 'amount', 'status', 'transaction_id', 'description',
+            'buyer_name', 'buyer_phone', 'items', 'total_cost', 'total_profit',
+            'item_count', 'created_at', 'updated_at', 'is_active',
+        ]
+        item_columns = [
+            'payment_id', 'product_id', 'bar_code', 'sku', 'name', 'quantity',
+            'unit_price', 'unit_cost', 'created_at', 'updated_at', 'is_active',
+        ]
+        total = options['payments']
+        max_items = max(1, options['max_items'])
+        # A few best sellers make up most of the basket lines.
+        product_weights = list(accumulate(1 / (rank + 1) for rank in range(len(products))))
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+        tz = store_timezone()
+        today = store_today()
+
+        payment_id = next_id(cursor, Payment)
+        loaded = 0
+        while loaded < total:
+            size = min(self.chunk_size, total - loaded)
+            picks = iter(self.random.choices(
+                range(len(products)), cum_weights=product_weights, k=size * max_items))
+            payment_rows = []
+            item_rows = []
+            for _ in range(size):
+                day = today - timedelta(days=self.random.randrange(options['days']))
+                hour = self.random.choices(range(24), cum_weights=hour_weights)[0]
+                created = datetime(
+                    day.year, day.month, day.day, hour, self.random.randrange(60),
+                    self.random.randrange(60), tzinfo=tz).isoformat()
+
+                items = []
+                amount = cost = count = 0
+                for _ in range(self.random.randint(1, max_items)):
+                    index = next(picks)
+                    product = products[index]
+                    quantity = self.random.choice([1, 1, 1, 2, 2, 3])
+                    items.append({
+                        'bar_code': product['bar_code'], 'sku': product['sku'],
+                        'name': product['name'], 'quantity': quantity,
+                        'price': product['price'], 'cost_price': product['cost_price'],
+                    })
+                    item_rows.append((
+                        payment_id, self.product_start + index, product['bar_code'],
+                        product['sku'], product['name'], quantity,
+                        product['price'], product['cost_price'], created, created, True,
+                    ))
+                    amount += product['price'] * quantity
+                    cost += product['cost_price'] * quantity
+                    count += quantity
+
+                roll = self.random.random()
+                status = 'paid' if roll < 0.92 else 'pending' if roll < 0.97 else 'failed'
+                buyer = self.random.choice(phones) if phones and self.random.random() < 0.4 else None
+                order_code = f"SEED{self.tag}-{payment_id}"
+                payment_rows.append((
+                    payment_id, order_code, amount, status, order_code,
+                    f"Đơn hàng {order_code}",
+                    f"Khách {buyer[0]}" if buyer else None, buyer[1] if buyer else None,
+                    json.dumps(items, ensure_ascii=False), cost, amount - cost, count,
+                    created, created, True,
+                ))
+                payment_id += 1
+
+            with transaction.atomic():
+                copy_rows(cursor, Payment, payment_columns, payment_rows)
+                copy_rows(cursor, PaymentItem, item_columns, item_rows)
+            loaded += size
+            self.stdout.write(f"Loaded {loaded}/{total} payments...")
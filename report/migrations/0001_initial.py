@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('bucket', models.DateField(unique=True)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('buyers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sales_rollup_daily',
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesRollupHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=19)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('buyers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sales_rollup_hourly',
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesRollupBuyer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(max_length=8)),
+                ('bucket', models.DateTimeField()),
+                ('buyer_phone', models.CharField(max_length=32)),
+            ],
+            options={
+                'db_table': 'sales_rollup_buyer',
+                'constraints': [models.UniqueConstraint(fields=('grain', 'bucket', 'buyer_phone'), name='sales_rollup_buyer_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,2 @@
+from .base import BaseModel
+from .sales_rollup import SalesRollupHourly, SalesRollupDaily, SalesRollupBuyer
@@ -0,0 +1,12 @@
+from django.db import models
+
+class BaseModel(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        abstract  = True
+
+    def __str__(self):
+        pass
\ No newline at end of file
@@ -0,0 +1,42 @@
+from .base import BaseModel
+from django.db import models
+
+class SalesRollupHourly(BaseModel):
+    bucket = models.DateTimeField(unique=True)
+    revenue = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    orders = models.PositiveIntegerField(default=0)
+    buyers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sales_rollup_hourly'
+
+
+class SalesRollupDaily(BaseModel):
+    bucket = models.DateField(unique=True)
+    revenue = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    orders = models.PositiveIntegerField(default=0)
+    buyers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sales_rollup_daily'
+
+
+class SalesRollupBuyer(models.Model):
+    # Buyers already counted in a bucket, so `buyers` can be kept as a
+    # distinct count while rollups are updated one payment at a time.
+    grain = models.CharField(max_length=8)
+    bucket = models.DateTimeField()
+    buyer_phone = models.CharField(max_length=32)
+
+    class Meta:
+        db_table = 'sales_rollup_buyer'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['grain', 'bucket', 'buyer_phone'],
+                name='sales_rollup_buyer_uniq'
+            ),
+        ]
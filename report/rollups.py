@@ -0,0 +1,117 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.db import connection, transaction
+from django.utils import timezone
+from .cache import invalidate_all, invalidate_payment
+from .timeseries import store_timezone, day_start
+
+HOUR = 'hour'
+DAY = 'day'
+
+UPSERT_SQL = """
+    INSERT INTO {table} (bucket, revenue, cost, profit, orders, buyers, created_at, updated_at, is_active)
+    VALUES (%s, %s, %s, %s, 1, %s, NOW(), NOW(), TRUE)
+    ON CONFLICT (bucket) DO UPDATE SET
+        revenue = {table}.revenue + EXCLUDED.revenue,
+        cost = {table}.cost + EXCLUDED.cost,
+        profit = {table}.profit + EXCLUDED.profit,
+        orders = {table}.orders + 1,
+        buyers = {table}.buyers + EXCLUDED.buyers,
+        updated_at = NOW()
+"""
+
+PAID_PAYMENTS_SQL = """
+    SELECT p.created_at, p.amount, p.total_cost AS cost,
+           NULLIF(p.buyer_phone, '') AS buyer_phone
+    FROM payment p
+    WHERE p.status = 'paid' AND p.is_active AND p.created_at >= %(since)s
+"""
+
+HOUR_SQL = "date_trunc('hour', s.created_at AT TIME ZONE %(tz)s) AT TIME ZONE %(tz)s"
+DAY_SQL = "(s.created_at AT TIME ZONE %(tz)s)::date"
+DAY_START_SQL = "date_trunc('day', s.created_at AT TIME ZONE %(tz)s) AT TIME ZONE %(tz)s"
+
+REBUILD_SQL = """
+    INSERT INTO {table} (bucket, revenue, cost, profit, orders, buyers, created_at, updated_at, is_active)
+    SELECT {bucket}, SUM(s.amount), SUM(s.cost), SUM(s.amount - s.cost),
+           COUNT(*), COUNT(DISTINCT s.buyer_phone), NOW(), NOW(), TRUE
+    FROM ({paid}) s
+    GROUP BY 1
+"""
+
+REBUILD_BUYERS_SQL = """
+    INSERT INTO sales_rollup_buyer (grain, bucket, buyer_phone)
+    SELECT DISTINCT %(grain)s, {bucket}, s.buyer_phone
+    FROM ({paid}) s
+    WHERE s.buyer_phone IS NOT NULL
+"""
+
+
+def hour_bucket(moment):
+    # Store hours, like bucket_series reads them: not every zone is a whole
+    # number of hours away from UTC.
+    return timezone.localtime(moment, timezone=store_timezone()).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    return timezone.localtime(moment, timezone=store_timezone()).date()
+
+
+def record_paid_payment(payment):
+    """
+    Add a payment that just became paid to its hourly and daily rollups and
+    drop the cached reports that cover it.
+    """
+    revenue = Decimal(payment.amount)
+    cost = Decimal(payment.total_cost)
+    hour = hour_bucket(payment.created_at)
+    day = day_bucket(payment.created_at)
+
+    with connection.cursor() as cursor:
+        new_buyers = set()
+        if payment.buyer_phone:
+            cursor.execute(
+                """
+                INSERT INTO sales_rollup_buyer (grain, bucket, buyer_phone)
+                VALUES (%s, %s, %s), (%s, %s, %s)
+                ON CONFLICT DO NOTHING
+                RETURNING grain
+                """,
+                [HOUR, hour, payment.buyer_phone, DAY, day_start(day), payment.buyer_phone]
+            )
+            new_buyers = {grain for (grain,) in cursor.fetchall()}
+
+        for table, bucket, grain in (
+            ('sales_rollup_hourly', hour, HOUR),
+            ('sales_rollup_daily', day, DAY),
+        ):
+            cursor.execute(
+                UPSERT_SQL.format(table=table),
+                [bucket, revenue, cost, revenue - cost, int(grain in new_buyers)]
+            )
+
+    invalidate_payment(payment)
+
+
+def rebuild_rollups(date_from=None):
+    since = day_start(date_from) if date_from else datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    params = {'since': since, 'tz': str(store_timezone())}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Block incremental updates while the window is recomputed.
+        cursor.execute(
+            "LOCK TABLE sales_rollup_hourly, sales_rollup_daily, sales_rollup_buyer IN EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM sales_rollup_hourly WHERE bucket >= %(since)s", params)
+        cursor.execute("DELETE FROM sales_rollup_daily WHERE bucket >= %(since_day)s",
+                       {'since_day': day_bucket(since)})
+        cursor.execute("DELETE FROM sales_rollup_buyer WHERE bucket >= %(since)s", params)
+
+        cursor.execute(REBUILD_SQL.format(
+            table='sales_rollup_hourly', bucket=HOUR_SQL, paid=PAID_PAYMENTS_SQL), params)
+        cursor.execute(REBUILD_SQL.format(
+            table='sales_rollup_daily', bucket=DAY_SQL, paid=PAID_PAYMENTS_SQL), params)
+        cursor.execute(REBUILD_BUYERS_SQL.format(
+            bucket=HOUR_SQL, paid=PAID_PAYMENTS_SQL), {**params, 'grain': HOUR})
+        cursor.execute(REBUILD_BUYERS_SQL.format(
+            bucket=DAY_START_SQL, paid=PAID_PAYMENTS_SQL), {**params, 'grain': DAY})
+        transaction.on_commit(invalidate_all)
@@ -1,3 +1,438 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from unittest import mock
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from home.get_dashboard.views import GetDashboardView
+from payments.models import Payment, PaymentItem
+from product.models import Product
+from .get_business_report.views import GetBusinessReport
+from .cache import cached_report, day_version_key, entry_key
+from .comparison import compare_periods
+from .models import SalesRollupDaily, SalesRollupHourly
+from .rollups import PAID_PAYMENTS_SQL, rebuild_rollups, record_paid_payment
+from .timeseries import HOUR, bucket_series, day_start, store_timezone, store_today
+
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+def full_scans(plan):
+    """Relations read by a sequential scan or by an index scan without a condition."""
+    scans = []
+    node_type = plan.get('Node Type')
+    if node_type == 'Seq Scan':
+        scans.append(plan.get('Relation Name'))
+    elif node_type in INDEX_SCANS and 'Index Cond' not in plan:
+        scans.append(plan.get('Index Name'))
+    for child in plan.get('Plans', []):
+        scans.extend(full_scans(child))
+    return scans
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Run EXPLAIN on every query the dashboard and business report issue and
+    fail if one of them has to read a hot table in full.
+
+    Sequential scans and hash/merge joins are disabled so the planner has
+    to drive every scan and join from an index; on a seeded database this
+    small it would otherwise happily scan whole tables.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        payments = Payment.objects.bulk_create([
+            Payment(
+                order_code=f"SEED{i}",
+                amount=10000 + i % 50 * 1000,
+                status='paid' if i % 10 else 'pending',
+                buyer_phone=f"09{i % 300:08d}" if i % 3 else None,
+                total_cost=8000,
+                total_profit=2000 + i % 50 * 1000,
+                item_count=2,
+            )
+            for i in range(5000)
+        ])
+        PaymentItem.objects.bulk_create([
+            PaymentItem(
+                payment=payment,
+                bar_code=f"89300{i % 40}",
+                sku=f"SKU{i % 40}",
+                name=f"Sản phẩm {i % 40}",
+                quantity=1,
+                unit_price=5000,
+                unit_cost=4000,
+            )
+            for payment in payments
+            for i in (payment.id, payment.id + 7)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE payment SET created_at = NOW() "
+                "- (id % 730) * INTERVAL '1 day' - (id % 24) * INTERVAL '1 hour'")
+        rebuild_rollups()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ANALYZE payment, payment_item, sales_rollup_hourly, sales_rollup_daily")
+
+    def assert_no_full_scans(self, queries):
+        self.assertTrue(queries)
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_hashjoin = off")
+            cursor.execute("SET LOCAL enable_mergejoin = off")
+            for sql in queries:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scanned = full_scans(plan[0]['Plan'])
+                self.assertEqual(scanned, [], f"Full scan of {scanned}:\n{sql}")
+
+    def capture(self, func, *args):
+        with CaptureQueriesContext(connection) as context:
+            func(*args)
+        return [query['sql'] for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')]
+
+    def test_dashboard_queries_use_indexes(self):
+        view = GetDashboardView()
+        for period in ('today', 'week', 'month'):
+            with self.subTest(period=period):
+                start_date, end_date = view.get_date_range(period)
+                prev_start, prev_end = view.get_previous_date_range(period, start_date)
+                self.assert_no_full_scans(self.capture(
+                    view.get_summary, period, start_date, end_date, prev_start, prev_end))
+
+    def test_business_report_queries_use_indexes(self):
+        view = GetBusinessReport()
+        end_date = store_today()
+        for period in ('week', 'month', 'year'):
+            with self.subTest(period=period):
+                start_date = view.get_start_date(period)
+                prev_start = start_date - (end_date - start_date)
+                prev_end = start_date - timedelta(days=1)
+                self.assert_no_full_scans(self.capture(
+                    view.get_summary, start_date, end_date, prev_start, prev_end))
+
+    def test_rollup_rebuild_scan_uses_index(self):
+        with connection.cursor() as cursor:
+            sql = cursor.mogrify(
+                PAID_PAYMENTS_SQL, {'since': '2020-01-01T00:00:00Z'})
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        self.assert_no_full_scans([sql])
+
+
+class SalesRollupTests(TestCase):
+    """Rollups kept one payment at a time must match a direct aggregate over payment."""
+
+    def setUp(self):
+        # 16:xx UTC is 23:xx in the store, 17:xx already the next store day.
+        moments = [
+            (datetime(2026, 3, 1, 16, 5, tzinfo=dt_timezone.utc), '0901', 'paid'),
+            (datetime(2026, 3, 1, 16, 40, tzinfo=dt_timezone.utc), '0901', 'paid'),
+            (datetime(2026, 3, 1, 16, 50, tzinfo=dt_timezone.utc), None, 'paid'),
+            (datetime(2026, 3, 1, 17, 10, tzinfo=dt_timezone.utc), '0901', 'paid'),
+            (datetime(2026, 3, 1, 17, 20, tzinfo=dt_timezone.utc), '0902', 'paid'),
+            (datetime(2026, 3, 1, 17, 30, tzinfo=dt_timezone.utc), '0903', 'pending'),
+        ]
+        for i, (moment, phone, status) in enumerate(moments):
+            payment = Payment.objects.create(
+                order_code=f"R{i}", amount=10000 * (i + 1), status=status,
+                buyer_phone=phone, total_cost=7000 * (i + 1))
+            Payment.objects.filter(pk=payment.pk).update(created_at=moment)
+
+    def record_paid(self):
+        for payment in Payment.objects.filter(status='paid').order_by('id'):
+            record_paid_payment(payment)
+
+    def expected(self):
+        hourly, daily = {}, {}
+        for payment in Payment.objects.filter(status='paid', is_active=True):
+            hour = payment.created_at.astimezone(store_timezone()).replace(minute=0, second=0, microsecond=0)
+            day = payment.created_at.astimezone(store_timezone()).date()
+            for buckets, bucket in ((hourly, hour), (daily, day)):
+                row = buckets.setdefault(bucket, [Decimal(0), Decimal(0), 0, set()])
+                row[0] += payment.amount
+                row[1] += payment.total_cost
+                row[2] += 1
+                if payment.buyer_phone:
+                    row[3].add(payment.buyer_phone)
+        return [
+            sorted((bucket, revenue, cost, revenue - cost, orders, len(buyers))
+                   for bucket, (revenue, cost, orders, buyers) in buckets.items())
+            for buckets in (hourly, daily)
+        ]
+
+    def rollups(self):
+        fields = ('bucket', 'revenue', 'cost', 'profit', 'orders', 'buyers')
+        return [
+            list(model.objects.order_by('bucket').values_list(*fields))
+            for model in (SalesRollupHourly, SalesRollupDaily)
+        ]
+
+    def test_incremental_rollups_match_payments(self):
+        self.record_paid()
+
+        hourly, daily = self.rollups()
+        self.assertEqual([hourly, daily], self.expected())
+        # 0901 bought twice in the 16:00 hour and on both store days.
+        self.assertEqual([row[5] for row in hourly], [1, 2])
+        self.assertEqual([row[5] for row in daily], [1, 2])
+
+    def test_rebuild_reproduces_incremental_rollups(self):
+        self.record_paid()
+        incremental = self.rollups()
+
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), incremental)
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), self.expected())
+
+    def test_payments_after_a_rebuild_count_only_new_buyers(self):
+        rebuild_rollups()
+        payment = Payment.objects.create(
+            order_code="R-late", amount=5000, status='paid', buyer_phone='0901', total_cost=1000)
+        Payment.objects.filter(pk=payment.pk).update(
+            created_at=datetime(2026, 3, 1, 17, 45, tzinfo=dt_timezone.utc))
+        payment.refresh_from_db()
+
+        record_paid_payment(payment)
+
+        self.assertEqual(self.rollups(), self.expected())
+
+
+@override_settings(STORE_TIME_ZONE='Asia/Kolkata')
+class StoreHourRollupTests(TestCase):
+    """Hourly rollups follow store hours, even in a zone 5:30 away from UTC."""
+
+    def setUp(self):
+        tz = store_timezone()
+        for i, moment in enumerate([
+                datetime(2026, 3, 1, 23, 10, tzinfo=tz), datetime(2026, 3, 1, 23, 50, tzinfo=tz),
+                datetime(2026, 3, 2, 0, 20, tzinfo=tz), datetime(2026, 3, 2, 5, 45, tzinfo=tz)]):
+            payment = Payment.objects.create(
+                order_code=f"H{i}", amount=1000 * (i + 1), status='paid', total_cost=0)
+            Payment.objects.filter(pk=payment.pk).update(created_at=moment)
+
+    def hourly(self):
+        tz = store_timezone()
+        return [
+            (bucket.astimezone(tz).replace(tzinfo=None), orders, revenue)
+            for bucket, orders, revenue in SalesRollupHourly.objects.order_by('bucket').values_list(
+                'bucket', 'orders', 'revenue')
+        ]
+
+    def assert_store_hours(self):
+        self.assertEqual(self.hourly(), [
+            (datetime(2026, 3, 1, 23), 2, 3000),
+            (datetime(2026, 3, 2, 0), 1, 3000),
+            (datetime(2026, 3, 2, 5), 1, 4000),
+        ])
+
+    def test_incremental_buckets_are_store_hours(self):
+        for payment in Payment.objects.order_by('id'):
+            record_paid_payment(payment)
+        self.assert_store_hours()
+
+    def test_rebuild_buckets_are_store_hours(self):
+        rebuild_rollups()
+        self.assert_store_hours()
+
+    def test_hourly_series_zero_fills_both_store_days(self):
+        rebuild_rollups()
+        today, yesterday = day_start(date(2026, 3, 2)), day_start(date(2026, 3, 1))
+
+        series = bucket_series(
+            HOUR, (today, today + timedelta(hours=23)), (yesterday, yesterday + timedelta(hours=23)))
+
+        self.assertEqual(len(series), 24)
+        self.assertEqual(
+            {point['bucket'].hour: point['revenue'] for point in series if point['revenue']},
+            {0: 3000, 5: 4000})
+        self.assertEqual(
+            {point['bucket'].hour: point['previous_revenue'] for point in series if point['previous_revenue']},
+            {23: 3000})
+
+
+
+class PeriodComparisonTests(TestCase):
+    """Two known store weeks, Monday 2 and Monday 9 March 2026."""
+
+    def setUp(self):
+        tz = store_timezone()
+        self.week = (datetime(2026, 3, 9, tzinfo=tz), datetime(2026, 3, 16, tzinfo=tz))
+        self.previous_week = (datetime(2026, 3, 2, tzinfo=tz), self.week[0])
+        for i, (moment, phone, amount, cost, status, is_active) in enumerate([
+                ((2026, 3, 2, 10), '0901', 10000, 6000, 'paid', True),
+                ((2026, 3, 3, 11), '', 5000, 3000, 'paid', True),
+                ((2026, 3, 4, 9), None, 2000, 1000, 'paid', True),
+                ((2026, 3, 8, 23, 59), None, 3000, 1000, 'paid', True),
+                ((2026, 3, 9, 0), '0901', 20000, 12000, 'paid', True),
+                ((2026, 3, 9, 8, 30), '0903', 4000, 2000, 'paid', True),
+                ((2026, 3, 10, 10), '0903', 6000, 3000, 'paid', True),
+                ((2026, 3, 11, 12), '', 1000, 500, 'paid', True),
+                ((2026, 3, 11, 13), '0904', 9000, 0, 'pending', True),
+                ((2026, 3, 12, 9), '0905', 9000, 0, 'paid', False),
+                ((2026, 3, 16, 0), '0906', 9000, 0, 'paid', True)]):
+            payment = Payment.objects.create(
+                order_code=f"W{i}", amount=amount, status=status, is_active=is_active,
+                buyer_phone=phone, total_cost=cost, total_profit=amount - cost)
+            Payment.objects.filter(pk=payment.pk).update(created_at=datetime(*moment, tzinfo=tz))
+
+    def test_compare_periods_totals_each_half_open_window(self):
+        windows = compare_periods(self.week, self.previous_week)
+
+        self.assertEqual(windows['current'], {
+            'revenue': 31000, 'orders': 4, 'cost': 17500, 'profit': 13500,
+            'customers': 3, 'known_customers': 2})
+        self.assertEqual(windows['previous'], {
+            'revenue': 20000, 'orders': 4, 'cost': 11000, 'profit': 9000,
+            'customers': 2, 'known_customers': 1})
+
+    def test_dashboard_growth_against_the_previous_week(self):
+        summary = GetDashboardView().get_summary('week', *self.week, *self.previous_week)
+
+        # '' is a walk-in like NULL, never a new customer.
+        self.assertEqual(summary['new_customers'], 2)
+        self.assertEqual(summary['today_customers'], 3)
+        self.assertAlmostEqual(summary['customer_growth'], 50.0)
+        self.assertAlmostEqual(summary['revenue_growth'], 55.0)
+        self.assertEqual(summary['revenue_comparison'], 11000)
+        self.assertEqual(summary['order_comparison'], 0)
+
+    def test_previous_days_line_up_by_position(self):
+        rebuild_rollups()
+
+        series = GetDashboardView().get_hourly_revenue('week', self.week[0], self.week[1])
+
+        self.assertEqual([point['date'] for point in series[:2]], ['2026-03-09', '2026-03-10'])
+        self.assertEqual(
+            [(point['revenue'], point['previous_revenue']) for point in series],
+            [(24000, 10000), (6000, 5000), (1000, 2000), (0, 0), (0, 0), (0, 0), (0, 3000)])
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReportCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.day = store_today()
+        self.calls = 0
+
+    def cached(self, value, delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return cached_report('test', {}, self.day, self.day, compute)
+
+    def test_paid_payment_changes_the_next_dashboard_response(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(User.objects.create_user('0911111111', password=None))
+
+        def revenue():
+            return client.get('/api/home/get/dashboard/', {'period': 'today'}).data['response']['today_revenue']
+
+        Payment.objects.create(order_code="C1", amount=10000, status='paid')
+        self.assertEqual(revenue(), 10000)
+        Payment.objects.create(order_code="C2", amount=2000, status='paid')
+        self.assertEqual(revenue(), 10000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_paid_payment(Payment.objects.create(order_code="C3", amount=5000, status='paid'))
+        self.assertEqual(revenue(), 17000)
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cached('fresh', delay=0.2)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['fresh'] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_waits_for_the_entry_another_process_is_computing(self):
+        key = entry_key('test', {}, self.day, self.day)
+        cache.add(f'{key}:lock', 1)
+        timer = threading.Timer(0.1, cache.set, [key, 'theirs'])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertEqual(self.cached('ours'), 'theirs')
+        self.assertEqual(self.calls, 0)
+
+    def test_evicted_version_never_revives_an_old_entry(self):
+        self.cached('old')
+        cache.delete(day_version_key(self.day))
+
+        self.assertEqual(self.cached('new'), 'new')
+        self.assertEqual(self.calls, 2)
+
+    def test_cache_errors_fall_back_to_compute(self):
+        entry_key('test', {}, self.day, self.day)
+        with mock.patch.object(cache, 'add', side_effect=ConnectionError("down")):
+            self.assertEqual(self.cached('fresh'), 'fresh')
+        with mock.patch.object(cache, 'set', side_effect=ConnectionError("down")):
+            self.assertEqual(self.cached('fresh'), 'fresh')
+        self.assertEqual(self.calls, 2)
+
+
+BENCHMARKED_ENDPOINTS = [
+    'dashboard', 'dashboard_month', 'business_report', 'business_report_year', 'product_list',
+    'customer_list', 'quick_search', 'barcode_scan', 'webhook', 'cash_checkout',
+]
+
+
+class StoreDataCommandTests(TestCase):
+    """Small-N smoke runs of the seed and benchmark commands."""
+
+    def test_seed_then_benchmark(self):
+        call_command(
+            'seed_store_data', products=20, payments=60, customers=10, debits=5,
+            days=3, chunk_size=16, stdout=mock.Mock())
+
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Payment.objects.count(), 60)
+        self.assertTrue(PaymentItem.objects.exists())
+        # Seeded rollups agree with the payments they summarise.
+        self.assertEqual(
+            SalesRollupDaily.objects.aggregate(orders=Sum('orders'))['orders'],
+            Payment.objects.filter(status='paid', is_active=True).count())
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = f"{directory}/benchmark.json"
+            # quick_search queries from worker threads on their own
+            # connections, which cannot see this test's transaction.
+            call_command(
+                'benchmark_endpoints', iterations=2, warmup=0, output=output, stdout=mock.Mock(),
+                endpoints=[name for name in BENCHMARKED_ENDPOINTS if name != 'quick_search'])
+            with open(output) as file:
+                result = json.load(file)
+
+        self.assertEqual(result['dataset'], {'products': 20, 'payments': 60})
+        self.assertEqual(len(result['endpoints']), len(BENCHMARKED_ENDPOINTS) - 1)
+        for name, endpoint in result['endpoints'].items():
+            self.assertTrue(all(code < 400 for code in endpoint['status_codes']), (name, endpoint))
+            self.assertGreater(endpoint['queries']['max'], 0, name)
 
-# Create your tests here.
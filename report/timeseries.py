@@ -0,0 +1,105 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db.models import Sum, Q, F
+from django.db.models.functions import TruncHour, TruncMonth
+from django.utils import timezone
+from .models import SalesRollupHourly, SalesRollupDaily
+
+HOUR = 'hour'
+DAY = 'day'
+MONTH = 'month'
+
+
+def store_timezone():
+    return ZoneInfo(settings.STORE_TIME_ZONE)
+
+
+def store_now():
+    return timezone.localtime(timezone=store_timezone())
+
+
+def store_today():
+    return store_now().date()
+
+
+def day_start(day):
+    return datetime.combine(day, time.min, tzinfo=store_timezone())
+
+
+def hour_buckets(start, end):
+    tz = store_timezone()
+    current = start.astimezone(tz).replace(minute=0, second=0, microsecond=0)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        # Step in absolute time so DST transitions never repeat an hour.
+        current = (current + timedelta(hours=1)).astimezone(tz)
+    return buckets
+
+
+def day_buckets(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def month_buckets(start, end):
+    buckets = []
+    current = start.replace(day=1)
+    while current <= end:
+        buckets.append(current)
+        current = (current + timedelta(days=32)).replace(day=1)
+    return buckets
+
+
+def bucket_series(grain, current, previous, fields=('revenue',)):
+    """
+    Aggregate rollup rows into `grain` buckets for the current window and the
+    previous (comparison) window in one GROUP BY query.
+
+    `current` and `previous` are (start, end) pairs: aware datetimes for
+    HOUR, dates for DAY and MONTH. Every bucket of the current window is
+    returned, zero-filled, with the matching bucket of the previous window
+    (by position) under `previous_<field>`.
+    """
+    if grain == HOUR:
+        model = SalesRollupHourly
+        period = TruncHour('bucket', tzinfo=store_timezone())
+        make_buckets = hour_buckets
+    elif grain == DAY:
+        model = SalesRollupDaily
+        period = F('bucket')
+        make_buckets = day_buckets
+    else:
+        model = SalesRollupDaily
+        period = TruncMonth('bucket')
+        make_buckets = month_buckets
+
+    (start, end), (prev_start, prev_end) = current, previous
+    in_current = Q(bucket__gte=start, bucket__lte=end)
+    in_previous = Q(bucket__gte=prev_start, bucket__lte=prev_end)
+
+    aggregates = {}
+    for field in fields:
+        aggregates[f'current_{field}'] = Sum(field, filter=in_current)
+        aggregates[f'previous_{field}'] = Sum(field, filter=in_previous)
+
+    rows = model.objects.filter(
+        in_current | in_previous
+    ).annotate(
+        period=period
+    ).values('period').annotate(**aggregates)
+    by_period = {row['period']: row for row in rows}
+
+    previous_buckets = make_buckets(prev_start, prev_end)
+    series = []
+    for index, bucket in enumerate(make_buckets(start, end)):
+        point = {'bucket': bucket}
+        current_row = by_period.get(bucket) or {}
+        previous_row = {}
+        if index < len(previous_buckets):
+            previous_row = by_period.get(previous_buckets[index]) or {}
+        for field in fields:
+            point[field] = int(current_row.get(f'current_{field}') or 0)
+            point[f'previous_{field}'] = int(previous_row.get(f'previous_{field}') or 0)
+        series.append(point)
+    return series